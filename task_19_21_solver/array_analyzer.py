@@ -0,0 +1,289 @@
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from auto_solver import (FIRST_BLOCK, Analyzer, Classification, Game, Move, StateGraph,
+                         TerminalCondition, compile_moves)
+
+
+# Коды меток в массиве
+UNRESOLVED, W1, L1, W2, L2 = range(5)
+
+# Сколько таблиц последователей держать в памяти одновременно
+CACHE_SIZE = 8
+
+
+# ============== Successor table ==============
+
+class SuccessorTable:
+    """
+    Таблица последователей dests[j, s - lo] = moves[j](s) для s ∈ [lo, hi].
+
+    Таблица зависит только от ходов и нижней границы, поэтому при росте
+    s_max она дополняется новыми состояниями, а не строится заново.
+    Здесь же хранятся готовые коды меток для уже разобранных диапазонов.
+    """
+
+    def __init__(self, moves: List[Move], lo: int):
+        self.moves = moves
+        self.lo = lo
+        self.hi = lo - 1
+        self._dests = np.empty((len(moves), 0), dtype=np.int64)
+        # monotonic -> (hi, буфер кодов меток для [lo, hi], обход был монотонным)
+        self.labels: Dict[str, Tuple[int, np.ndarray, bool]] = {}
+
+    def ensure(self, hi: int) -> None:
+        """Досчитывает последователей до hi включительно."""
+        if hi <= self.hi:
+            return
+
+        n = self.hi - self.lo + 1
+        size = hi - self.lo + 1
+
+        # Запас по ёмкости, чтобы серия расширений стоила O(delta)
+        if size > self._dests.shape[1]:
+            grown = np.empty((len(self.moves), max(size, 2 * self._dests.shape[1])), dtype=np.int64)
+            grown[:, :n] = self._dests[:, :n]
+            self._dests = grown
+
+        states = np.arange(self.hi + 1, hi + 1, dtype=np.int64)
+        compile_moves(tuple(self.moves)).successors(states, out=self._dests[:, n:size])
+
+        self.hi = hi
+
+    def dests(self, hi: int) -> np.ndarray:
+        """Последователи для s ∈ [lo, hi]."""
+        self.ensure(hi)
+        return self._dests[:, :max(hi - self.lo + 1, 0)]
+
+
+_tables: OrderedDict[tuple, SuccessorTable] = OrderedDict()
+
+
+def successor_table(terminal: TerminalCondition, moves: List[Move], lo: int) -> SuccessorTable:
+    """Общая для всех анализов таблица последователей (LRU на CACHE_SIZE игр)."""
+    key = (terminal, tuple(moves), lo)
+
+    table = _tables.get(key)
+    if table is None:
+        table = SuccessorTable(list(moves), lo)
+        _tables[key] = table
+        if len(_tables) > CACHE_SIZE:
+            _tables.popitem(last=False)
+    else:
+        _tables.move_to_end(key)
+
+    return table
+
+
+def clear_successor_tables() -> None:
+    """Освобождает все закешированные таблицы последователей и метки."""
+    _tables.clear()
+
+
+# ============== Array analyzer ==============
+
+class ArrayAnalyzer(Analyzer):
+    """
+    Векторизованный вариант Analyzer для арифметических ходов.
+
+    Таблица переходов (индексы последователей для каждого хода) строится
+    один раз, после чего метки W1/L1/W2/L2 расставляются целыми слоями
+    операциями NumPy. Результат совпадает с Analyzer.classify_up_to_k2,
+    в том числе для немонотонных игр.
+    """
+
+    def __init__(self, game: Game):
+        super().__init__(game)
+        self.lo, self.hi = self.walk_range()
+        self.table = successor_table(game.terminal, game.moves, self.lo)
+        self._codes = None
+        self._valid = None
+
+    @property
+    def n(self) -> int:
+        return max(self.hi - self.lo + 1, 0)
+
+    def _walk_is_valid_from(self, start: int) -> bool:
+        # То же, что Analyzer.walk_is_valid, но по готовой таблице последователей
+        # и только для состояний начиная с индекса start
+        g = self.g
+        expected = "decreasing" if g.terminal.comparator == "le" else "increasing"
+        if g.monotonic != expected:
+            return False
+
+        s = np.arange(self.lo + start, self.hi + 1, dtype=np.int64)
+        dests = self.table.dests(self.hi)[:, start:]
+        active = ~np.asarray(g.terminal.is_terminal(s), dtype=bool)
+        moved = dests < s if expected == "decreasing" else dests > s
+
+        return bool((moved | ~active).all())
+
+    def walk_is_valid(self) -> bool:
+        return self._walk_is_valid_from(0)
+
+    def _label_from(self, codes: np.ndarray, start: int) -> None:
+        """
+        Расставляет метки codes[start:n] при уже готовых codes[:start].
+
+        Метка состояния зависит только от состояний, обойдённых раньше него,
+        поэтому блок размечается целыми слоями W1, L1, W2, L2, а за метками
+        последователей вне блока мы обращаемся в codes.
+        """
+        g = self.g
+        block = codes[start:self.n]
+        block[:] = UNRESOLVED
+        if not g.moves:
+            return
+
+        s = np.arange(self.lo + start, self.hi + 1, dtype=np.int64)
+        dests = self.table.dests(self.hi)[:, start:]
+
+        if g.terminal.comparator == "le":
+            before = dests < s
+        else:
+            before = dests > s
+
+        # Последователь лежит в диапазоне и обходится раньше s
+        # (только такие метки видит последовательный classify_up_to_k2)
+        known = before & (dests >= self.lo) & (dests <= self.hi)
+        idx = np.where(known, dests - self.lo, 0)
+
+        w1 = g.terminal.is_terminal(dests).any(axis=0)
+        block[w1] = W1
+
+        l1 = ~w1 & (known & (codes[idx] == W1)).all(axis=0)
+        block[l1] = L1
+
+        w2 = ~w1 & ~l1 & (known & (codes[idx] == L1)).any(axis=0)
+        block[w2] = W2
+
+        succ = codes[idx]
+        l2 = (block == UNRESOLVED) & (known & ((succ == W1) | (succ == W2))).all(axis=0)
+        block[l2] = L2
+
+    def label_codes(self) -> np.ndarray:
+        """Массив кодов меток (UNRESOLVED/W1/L1/W2/L2) для s ∈ [lo, hi]."""
+        if self._codes is not None:
+            return self._codes
+
+        n = self.n
+        increasing_walk = self.g.terminal.comparator == "le"
+        cached = self.table.labels.get(self.g.monotonic)
+
+        if cached is not None:
+            hi, buffer, valid = cached
+
+            if hi == self.hi:
+                self._codes = buffer[:n]
+                self._valid = valid
+                return self._codes
+
+            # При обходе снизу вверх метки не зависят от состояний выше,
+            # так что готовый префикс переиспользуется, а досчитывается
+            # только хвост
+            if valid and increasing_walk and self.hi < hi:
+                self._codes = buffer[:n]
+                self._valid = True
+                return self._codes
+
+            old_n = max(hi - self.lo + 1, 0)
+            if valid and increasing_walk and self._walk_is_valid_from(old_n):
+                if len(buffer) < n:
+                    grown = np.empty(max(n, 2 * len(buffer)), dtype=np.uint8)
+                    grown[:old_n] = buffer[:old_n]
+                    buffer = grown
+
+                self._label_from(buffer, old_n)
+                self.table.labels[self.g.monotonic] = (self.hi, buffer, True)
+                self._codes = buffer[:n]
+                self._valid = True
+                return self._codes
+
+        codes = np.full(n, UNRESOLVED, dtype=np.uint8)
+        valid = self.walk_is_valid()
+
+        if valid:
+            self._label_from(codes, 0)
+        else:
+            # Коды W1/L1/W2/L2 совпадают с числом ходов 1..4
+            plies = StateGraph.for_game(self.g, self.lo, self.hi).retrograde(max_depth=2)
+            codes[plies > 0] = plies[plies > 0]
+
+        self.table.labels[self.g.monotonic] = (self.hi, codes, valid)
+        self._codes = codes
+        self._valid = valid
+        return codes
+
+    def extend(self, new_s_max: int) -> None:
+        """
+        Переводит анализ на новый s_max.
+
+        Для игр с условием 'le' и убывающими ходами метки ниже прежнего
+        s_max не меняются, поэтому досчитываются только новые состояния —
+        O(delta) вместо O(всего диапазона). В остальных случаях разметка
+        строится заново.
+        """
+        self.label_codes()
+
+        self.g = replace(self.g, s_max=new_s_max)
+        self.lo, self.hi = self.walk_range()
+        self._codes = None
+
+        self.label_codes()
+
+    @staticmethod
+    def _classification(codes: np.ndarray, s_min: int) -> Classification:
+        # Коды W1/L1/W2/L2 совпадают с числом ходов 1..4
+        plies = codes.astype(np.int32)
+        plies[plies == UNRESOLVED] = -1
+
+        return Classification.from_plies(s_min, plies)
+
+    def classification_up_to_k2(self) -> Classification:
+        return self._classification(self.label_codes(), self.lo)
+
+    def iter_blocks(self, first: int = FIRST_BLOCK) -> Iterator[Classification]:
+        """
+        Как Analyzer.iter_blocks, но блоки растут вдвое: разметка
+        префикса [lo, hi] расширяется через extend, пока не дойдёт до s_max.
+        """
+        g = self.g
+
+        if g.terminal.comparator != "le" or g.monotonic != "decreasing":
+            yield self.classification_up_to_k2()
+            return
+
+        probe = ArrayAnalyzer(replace(g, s_max=min(self.hi, self.lo + first - 1)))
+        start = self.lo
+
+        while True:
+            codes = probe.label_codes()
+
+            if not probe._valid:
+                # Префикс перестал быть монотонным: метки ниже start от
+                # этого не меняются, остальное берём из полной разметки
+                rest = self.classification_up_to_k2()
+                yield Classification(start, rest.values[start - self.lo:], rest.depth[start - self.lo:])
+                return
+
+            yield self._classification(codes[start - self.lo:], start)
+
+            if probe.hi >= self.hi:
+                return
+
+            start = probe.hi + 1
+            probe.extend(min(self.hi, self.lo + 2 * (probe.hi - self.lo + 1) - 1))
+
+
+if __name__ == "__main__":
+    from auto_solver import build_current_game
+
+    game = build_current_game(s_max=600)
+    ans = ArrayAnalyzer(game).solve_19_20_21()
+    print("Задание 19:", ans["19"])
+    print("Задание 20:", *ans["20"])
+    print("Задание 21:", ans["21"])
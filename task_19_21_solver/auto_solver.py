@@ -1,8 +1,20 @@
 from __future__ import annotations
+import re
 from dataclasses import dataclass
-from typing import Callable, List, Dict, Set
+from functools import lru_cache
+from typing import Callable, List, Dict, Iterable, Iterator, Tuple
 from abc import ABC, abstractmethod
 
+import numpy as np
+
+
+# Размер блока при поблочном просмотре больших диапазонов
+SCAN_CHUNK = 1 << 16
+# Первый блок ленивой разметки; дальше блоки растут вдвое до SCAN_CHUNK
+FIRST_BLOCK = 1 << 10
+# Слои ретроградного анализа уже этого размера обрабатываются без NumPy
+SMALL_FRONTIER = 64
+
 
 # ============== Moves ==============
 
@@ -13,6 +25,18 @@ class Move(ABC):
     def apply(self, s: int) -> int:
         ...
 
+    def apply_array(self, s: np.ndarray) -> np.ndarray:
+        """Применяет ход сразу ко всему массиву состояний."""
+        return np.fromiter((self.apply(int(x)) for x in s), dtype=np.int64, count=len(s))
+
+    def source(self, var: str) -> str | None:
+        """Выражение Python для хода из состояния var (None — только через apply)."""
+        return None
+
+    def array_source(self, var: str) -> str | None:
+        """То же для массива состояний var."""
+        return self.source(var)
+
 
 @dataclass(frozen=True)
 class AddMove(Move):
@@ -24,6 +48,12 @@ class AddMove(Move):
     def apply(self, s: int) -> int:
         return s + self.k
 
+    def apply_array(self, s: np.ndarray) -> np.ndarray:
+        return s + self.k
+
+    def source(self, var: str) -> str:
+        return f"{var} + {self.k}"
+
 
 @dataclass(frozen=True)
 class SubtractMove(Move):
@@ -35,6 +65,12 @@ class SubtractMove(Move):
     def apply(self, s: int) -> int:
         return s - self.k
 
+    def apply_array(self, s: np.ndarray) -> np.ndarray:
+        return s - self.k
+
+    def source(self, var: str) -> str:
+        return f"{var} - {self.k}"
+
 
 @dataclass(frozen=True)
 class MultiplyMove(Move):
@@ -46,6 +82,36 @@ class MultiplyMove(Move):
     def apply(self, s: int) -> int:
         return s * self.factor
 
+    def apply_array(self, s: np.ndarray) -> np.ndarray:
+        return s * self.factor
+
+    def source(self, var: str) -> str:
+        return f"{var} * {self.factor}"
+
+
+def _floor_div(s, d):
+    return s // d
+
+
+def _ceil_div(s, d):
+    return -(-s // d)
+
+
+def _round_div(s: int, d: int) -> int:
+    return int(round(s / d))
+
+
+def _round_div_array(s: np.ndarray, d: int) -> np.ndarray:
+    return np.rint(s / d).astype(np.int64)
+
+
+# Режим деления -> (функция для int, функция для массива)
+DIVIDE_MODES = {
+    "floor": (_floor_div, _floor_div),
+    "ceil": (_ceil_div, _ceil_div),
+    "round": (_round_div, _round_div_array),
+}
+
 
 @dataclass(frozen=True)
 class DivideMove(Move):
@@ -55,23 +121,47 @@ class DivideMove(Move):
     def __post_init__(self):
         object.__setattr__(self, "name", f"//{self.divisor}({self.mode})")
 
+        # Режим деления выбирается один раз, а не на каждом вызове apply;
+        # в таблице обычные функции модуля, так что ход сериализуется pickle
+        if self.mode not in DIVIDE_MODES:
+            raise ValueError(f"Unknown divide mode: {self.mode}")
+        scalar, array = DIVIDE_MODES[self.mode]
+        object.__setattr__(self, "_apply", scalar)
+        object.__setattr__(self, "_apply_array", array)
+
     def apply(self, s: int) -> int:
+        return self._apply(s, self.divisor)
+
+    def apply_array(self, s: np.ndarray) -> np.ndarray:
+        return self._apply_array(s, self.divisor)
+
+    def source(self, var: str) -> str:
         d = self.divisor
         if self.mode == "floor":
-            return s // d
+            return f"{var} // {d}"
         elif self.mode == "ceil":
             # целочисленное округление вверх
-            return -(-s // d)
+            return f"-(-{var} // {d})"
         elif self.mode == "round":
-            return int(round(s / d))
+            return f"int(round({var} / {d}))"
         else:
             raise ValueError(f"Unknown divide mode: {self.mode}")
 
+    def array_source(self, var: str) -> str:
+        if self.mode == "round":
+            # np.rint, как и round, округляет половины к чётному
+            return f"np.rint({var} / {self.divisor}).astype(np.int64)"
+
+        return self.source(var)
+
 
 @dataclass(frozen=True)
 class FuncMove(Move):
     f: Callable[[int], int]
     label: str = "f(s)"
+    # f можно вызвать сразу на массиве int64 и получить тот же результат,
+    # что и поэлементно (только арифметика без ветвлений и переполнения)
+    vectorized: bool = False
 
     def __post_init__(self):
         object.__setattr__(self, "name", self.label)
@@ -79,6 +169,64 @@ class FuncMove(Move):
     def apply(self, s: int) -> int:
         return self.f(s)
 
+    def apply_array(self, s: np.ndarray) -> np.ndarray:
+        if self.vectorized:
+            result = self.f(s)
+            if not (isinstance(result, np.ndarray) and result.shape == s.shape
+                    and np.issubdtype(result.dtype, np.integer)):
+                raise TypeError(f"FuncMove {self.name!r} returned {type(result).__name__}, "
+                                f"expected an integer array of shape {s.shape}")
+
+            return result.astype(np.int64, copy=False)
+
+        return super().apply_array(s)
+
+
+# ============== Move compilation ==============
+
+class CompiledMoves:
+    """
+    Список ходов, собранный в две сгенерированные функции:
+    - next_states(s) — отсортированные уникальные ходы из одного состояния;
+    - successors(states, out) — out[j] = moves[j](states) для массива.
+
+    Ходы с source() подставляются выражениями, остальные вызываются
+    напрямую, поэтому при анализе нет диспетчеризации по типу хода.
+    """
+
+    def __init__(self, moves: Tuple[Move, ...]):
+        self.moves = moves
+
+        env = {"np": np}
+        scalar = []
+        array = []
+
+        for i, m in enumerate(moves):
+            env[f"_m{i}"] = m
+            scalar.append(m.source("s") or f"_m{i}.apply(s)")
+            array.append(m.array_source("s") or f"_m{i}.apply_array(s)")
+
+        self.code = "def next_states(s):\n"
+        self.code += f"    return sorted({{{', '.join(scalar)}}})\n" if scalar else "    return []\n"
+        self.code += "\ndef successors(s, out):\n"
+        self.code += "".join(f"    out[{i}] = {e}\n" for i, e in enumerate(array)) or "    pass\n"
+
+        exec(self.code, env)
+        self.next_states = env["next_states"]
+        self._successors = env["successors"]
+
+    def successors(self, states: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        if out is None:
+            out = np.empty((len(self.moves), len(states)), dtype=np.int64)
+
+        self._successors(states, out)
+        return out
+
+
+@lru_cache(maxsize=64)
+def compile_moves(moves: Tuple[Move, ...]) -> CompiledMoves:
+    return CompiledMoves(moves)
+
 
 # ============== Terminal condition ==============
 
@@ -108,7 +256,241 @@ class Game:
 
     def next_states(self, s: int) -> List[int]:
         # Уникальные ходы
-        return sorted({m.apply(s) for m in self.moves})
+        return compile_moves(tuple(self.moves)).next_states(s)
+
+    def is_monotonic(self, lo: int | None = None, hi: int | None = None) -> bool:
+        """
+        Проверяет, что из каждой нетерминальной s ∈ [lo, hi] (по умолчанию
+        [s_min, s_max]) все ходы строго сдвигают s в сторону self.monotonic.
+        """
+        lo = self.s_min if lo is None else lo
+        hi = self.s_max if hi is None else hi
+
+        compiled = compile_moves(tuple(self.moves))
+
+        # Проверяем блоками, чтобы не держать всю таблицу ходов в памяти
+        for start in range(lo, hi + 1, SCAN_CHUNK):
+            s = np.arange(start, min(start + SCAN_CHUNK, hi + 1), dtype=np.int64)
+            s = s[~np.asarray(self.terminal.is_terminal(s), dtype=bool)]
+            d = compiled.successors(s)
+
+            ok = d < s if self.monotonic == "decreasing" else d > s
+            if not ok.all():
+                return False
+
+        return True
+
+
+# ============== Classification ==============
+
+# Значение позиции в Classification.values
+UNRESOLVED, WIN, LOSS, DRAW = range(4)
+
+
+@dataclass
+class Classification:
+    """
+    Компактный результат анализа для s ∈ [s_min, s_max]:
+    values[s - s_min] — UNRESOLVED/WIN/LOSS/DRAW, depth[s - s_min] — k из
+    метки 'W{k}'/'L{k}' (0 — игра уже окончена).
+    """
+    s_min: int
+    values: np.ndarray  # uint8
+    depth: np.ndarray  # int32
+
+    @classmethod
+    def from_plies(cls, s_min: int, plies: np.ndarray,
+                   draws: np.ndarray | None = None) -> Classification:
+        """По числу ходов до конца игры (-1 — не определено, 0 — терминал)."""
+        resolved = plies >= 0
+
+        values = np.full(len(plies), UNRESOLVED, dtype=np.uint8)
+        values[resolved & (plies % 2 == 1)] = WIN
+        values[resolved & (plies % 2 == 0)] = LOSS
+        if draws is not None:
+            values[draws] = DRAW
+
+        depth = np.where(resolved, (plies + 1) // 2, 0).astype(np.int32)
+        return cls(s_min, values, depth)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def s_max(self) -> int:
+        return self.s_min + len(self.values) - 1
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + self.depth.nbytes
+
+    @staticmethod
+    def _parse(label: str) -> Tuple[int, int | None]:
+        if label == "UNRESOLVED":
+            return UNRESOLVED, None
+        if label == "DRAW":
+            return DRAW, None
+        if label[:1] not in ("W", "L"):
+            raise ValueError(f"Unknown label: {label!r}")
+
+        value = WIN if label[0] == "W" else LOSS
+        return value, int(label[1:]) if len(label) > 1 else None
+
+    def _match(self, label: str, start: int = 0, stop: int | None = None) -> np.ndarray:
+        value, k = self._parse(label)
+        mask = self.values[start:stop] == value
+        if k is not None:
+            mask &= self.depth[start:stop] == k
+
+        return mask
+
+    def mask(self, label: str) -> np.ndarray:
+        """Маска состояний с меткой label ('W2', 'L1'; 'W'/'L' — любой глубины)."""
+        return self._match(label)
+
+    def count(self, label: str) -> int:
+        return int(np.count_nonzero(self._match(label)))
+
+    def first_k(self, label: str, k: int) -> List[int]:
+        """k наименьших s с меткой label; просмотр идёт блоками и прекращается досрочно."""
+        found: List[int] = []
+
+        for start in range(0, len(self.values), SCAN_CHUNK):
+            hits = np.flatnonzero(self._match(label, start, start + SCAN_CHUNK))
+            found.extend((hits[:k - len(found)] + self.s_min + start).tolist())
+            if len(found) >= k:
+                break
+
+        return found
+
+    def min_of(self, label: str) -> int | None:
+        found = self.first_k(label, 1)
+        return found[0] if found else None
+
+    def label(self, s: int) -> str:
+        i = s - self.s_min
+        value = int(self.values[i])
+
+        if value == WIN:
+            return f"W{self.depth[i]}"
+        elif value == LOSS:
+            return f"L{self.depth[i]}"
+        elif value == DRAW:
+            return "DRAW"
+        return "UNRESOLVED"
+
+    def moves_to_end(self) -> np.ndarray:
+        """Число ходов до конца при оптимальной игре (-1 — не определено)."""
+        plies = np.full(len(self.values), -1, dtype=np.int32)
+        wins = self.values == WIN
+        losses = self.values == LOSS
+
+        plies[wins] = 2 * self.depth[wins] - 1
+        plies[losses] = 2 * self.depth[losses]
+        return plies
+
+    def to_dict(self, descending: bool = False) -> Dict[int, str]:
+        """Словарь s -> метка без терминальных позиций (для совместимости)."""
+        names = {(WIN, 0): None, (LOSS, 0): None}
+        result: Dict[int, str] = {}
+
+        order = range(len(self.values))
+        if descending:
+            order = reversed(order)
+
+        values = self.values.tolist()
+        depth = self.depth.tolist()
+
+        for i in order:
+            key = (values[i], depth[i])
+            if key not in names:
+                names[key] = self.label(self.s_min + i)
+
+            name = names[key]
+            if name is not None:
+                result[self.s_min + i] = name
+
+        return result
+
+    def answers_19_20_21(self) -> dict:
+        # 19: минимальный S в L1; 20: два наименьших S в W2;
+        # 21: минимальный S в L2
+        return {
+            "19": self.min_of("L1"),
+            "20": self.first_k("W2", 2),
+            "21": self.min_of("L2"),
+        }
+
+
+def collect_answers(blocks: Iterable[Classification]) -> dict:
+    """
+    Ответы 19–21 по блокам разметки, идущим по возрастанию s.
+    Блоки читаются только до тех пор, пока ответы не определены.
+    """
+    answers = {"19": None, "20": [], "21": None}
+
+    for block in blocks:
+        part = block.answers_19_20_21()
+
+        if answers["19"] is None:
+            answers["19"] = part["19"]
+        answers["20"] += part["20"][:2 - len(answers["20"])]
+        if answers["21"] is None:
+            answers["21"] = part["21"]
+
+        if answers["19"] is not None and len(answers["20"]) == 2 and answers["21"] is not None:
+            break
+
+    return answers
+
+
+# ============== Periodic pattern ==============
+
+@dataclass
+class PeriodicPattern:
+    """
+    Разметка s ≥ s_min в виде числа ходов до конца (-1 — не определено):
+    plies[s - s_min] для первых start + period состояний, дальше
+    plies(s + period) = plies(s) + shift.
+    """
+    s_min: int
+    start: int
+    period: int
+    shift: int
+    plies: np.ndarray  # int64, длина start + period
+
+    def plies_at(self, s: int) -> int:
+        i = s - self.s_min
+        if i < 0:
+            raise ValueError(f"s={s} is below s_min={self.s_min}")
+        if i < len(self.plies):
+            return int(self.plies[i])
+
+        q, r = divmod(i - self.start, self.period)
+        p = int(self.plies[self.start + r])
+        return p + q * self.shift if p >= 0 else p
+
+    def label(self, s: int) -> str:
+        p = self.plies_at(s)
+        if p < 0:
+            return "UNRESOLVED"
+        return f"W{(p + 1) // 2}" if p % 2 else f"L{p // 2}"
+
+    def classification(self, s_max: int) -> Classification:
+        """Явная разметка для s ∈ [s_min, s_max]."""
+        i = np.arange(max(s_max - self.s_min + 1, 0), dtype=np.int64)
+        periodic = i >= self.start
+        q, r = np.divmod(i - self.start, self.period)
+
+        plies = self.plies[np.where(periodic, self.start + r, i)]
+        plies = np.where(periodic & (plies >= 0), plies + q * self.shift, plies)
+        return Classification.from_plies(self.s_min, plies)
+
+    def answers_19_20_21(self, s_max: int) -> dict:
+        # Глубина за период не убывает, поэтому первые вхождения меток
+        # лежат в префиксе и двух первых периодах
+        limit = self.s_min + self.start + 2 * self.period - 1
+        return self.classification(min(s_max, limit)).answers_19_20_21()
 
 
 # ============== Analyzer ==============
@@ -117,75 +499,597 @@ class Analyzer:
     def __init__(self, game: Game):
         self.g = game
 
-    def classify_up_to_k2(self) -> Dict[int, str]:
-        """
-        Возвращает словарь: s -> one of {'W1', 'L1', 'W2', 'L2', 'UNRESOLVED'}
-        Предполагается монотонность всех ходов в одну сторону.
-        """
+    def walk_range(self) -> Tuple[int, int]:
+        """Диапазон состояний, который обходит classify_up_to_k2."""
         g = self.g
         t = g.terminal
 
-        labels: Dict[int, str] = {}
-        W: Dict[int, Set[int]] = {1: set(), 2: set()}
-        L: Dict[int, Set[int]] = {0: set(), 1: set(), 2: set()}
-
-        # База: терминальные позиции
         if t.comparator == "le":
-            # Терминал: s <= T
-            L[0] = set(range(g.s_min, min(g.s_max, t.threshold) + 1))
-            # Для убывающих ходов идём от T+1 вверх
-            state_iter = range(t.threshold + 1, g.s_max + 1)
+            return t.threshold + 1, g.s_max
+        elif t.comparator == "ge":
+            return g.s_min, min(g.s_max, t.threshold - 1)
         else:
-            # Терминал: s >= T
-            L[0] = set(range(max(g.s_min, t.threshold), g.s_max + 1))
-            # Для возрастающих ходов идём сверху вниз
-            state_iter = range(min(g.s_max, t.threshold - 1), g.s_min - 1, -1)
+            raise ValueError("comparator must be 'le' or 'ge'")
+
+    def walk_is_valid(self) -> bool:
+        """
+        Последовательный обход верен, только если игра монотонна в сторону
+        терминала: убывающая для 'le' и возрастающая для 'ge'.
+        """
+        g = self.g
+        expected = "decreasing" if g.terminal.comparator == "le" else "increasing"
+
+        return g.monotonic == expected and g.is_monotonic(*self.walk_range())
+
+    def _classification_up_to_k2_graph(self) -> Classification:
+        """classification_up_to_k2 для немонотонных игр через граф состояний."""
+        lo, hi = self.walk_range()
+        plies = StateGraph.for_game(self.g, lo, hi).retrograde(max_depth=2)
+
+        return Classification.from_plies(lo, plies)
+
+    def _walk(self, plies: bytearray, lo: int, hi: int, state_iter: Iterable[int]) -> None:
+        """
+        Последовательно размечает состояния state_iter в plies[s - lo]:
+        1 — W1, 2 — L1, 3 — W2, 4 — L2, 0 — не определено или не обойдено.
+        """
+        t = self.g.terminal
+        next_states = compile_moves(tuple(self.g.moves)).next_states
 
         for s in state_iter:
-            dests = g.next_states(s)
+            dests = next_states(s)
 
             # W1: есть ход в терминал
             if any(t.is_terminal(d) for d in dests):
-                labels[s] = "W1"
-                W[1].add(s)
+                plies[s - lo] = 1
                 continue
 
-            # L1: не W1 и все ходы ведут в W1
-            if dests and all(d in W[1] for d in dests):
-                labels[s] = "L1"
-                L[1].add(s)
-                continue
+            succ = [plies[d - lo] if lo <= d <= hi else 0 for d in dests]
 
+            # L1: не W1 и все ходы ведут в W1
+            if succ and all(p == 1 for p in succ):
+                plies[s - lo] = 2
             # W2: есть ход в L1
-            if any(d in L[1] for d in dests):
-                labels[s] = "W2"
-                W[2].add(s)
-                continue
+            elif 2 in succ:
+                plies[s - lo] = 3
+            # L2: не W1/W2 и все ходы ведут в W1∪W2
+            elif succ and all(p in (1, 3) for p in succ):
+                plies[s - lo] = 4
 
-            # L2: не W1/В2 и все ходы ведут в W1∪W2
-            if dests and all((d in W[1] or d in W[2]) for d in dests):
-                labels[s] = "L2"
-                L[2].add(s)
+    @staticmethod
+    def _walk_result(plies: bytearray, s_min: int) -> Classification:
+        plies = np.frombuffer(plies, dtype=np.uint8).astype(np.int32)
+        plies[plies == 0] = -1
+
+        return Classification.from_plies(s_min, plies)
+
+    def classification_up_to_k2(self) -> Classification:
+        """
+        Метки W1/L1/W2/L2/UNRESOLVED для состояний из walk_range().
+        Если ходы не монотонны, используется анализ графа состояний.
+        """
+        if not self.walk_is_valid():
+            return self._classification_up_to_k2_graph()
+
+        lo, hi = self.walk_range()
+        plies = bytearray(max(hi - lo + 1, 0))
+
+        if self.g.terminal.comparator == "le":
+            # Для убывающих ходов идём от T+1 вверх
+            self._walk(plies, lo, hi, range(lo, hi + 1))
+        else:
+            # Для возрастающих ходов идём сверху вниз
+            self._walk(plies, lo, hi, range(hi, lo - 1, -1))
+
+        return self._walk_result(plies, lo)
+
+    def iter_blocks(self) -> Iterator[Classification]:
+        """
+        Разметка classification_up_to_k2 блоками по возрастанию s.
+
+        Для игр с 'le' и убывающими ходами метка s зависит только от меньших
+        состояний, поэтому растущие блоки считаются по мере чтения и потребитель
+        может остановиться в любой момент. Монотонность тоже проверяется
+        поблочно; с первого немонотонного блока (и для остальных игр)
+        используется полная разметка.
+        """
+        g = self.g
+        lo, hi = self.walk_range()
+
+        if g.terminal.comparator != "le" or g.monotonic != "decreasing":
+            yield self.classification_up_to_k2()
+            return
+
+        plies = bytearray()
+        start = lo
+        size = FIRST_BLOCK
+
+        while start <= hi:
+            stop = min(start + size - 1, hi)
+            plies.extend(bytes(stop - start + 1))
+
+            if not g.is_monotonic(start, stop):
+                # Метки ниже start от этого не меняются: их последователи
+                # лежат в уже проверенной монотонной части
+                rest = self._classification_up_to_k2_graph()
+                yield Classification(start, rest.values[start - lo:], rest.depth[start - lo:])
+                return
+
+            self._walk(plies, lo, hi, range(start, stop + 1))
+            yield self._walk_result(plies[start - lo:stop - lo + 1], start)
+
+            start = stop + 1
+            size = min(2 * size, SCAN_CHUNK)
+
+    def iter_up_to_k2(self) -> Iterator[Tuple[int, str]]:
+        """Пары (s, метка) по возрастанию s, вычисляемые по мере чтения."""
+        for block in self.iter_blocks():
+            for s in range(block.s_min, block.s_max + 1):
+                yield s, block.label(s)
+
+    def classify_up_to_k2(self) -> Dict[int, str]:
+        """
+        Возвращает словарь: s -> one of {'W1', 'L1', 'W2', 'L2', 'UNRESOLVED'}
+        Для больших диапазонов лучше classification_up_to_k2().
+        """
+        descending = self.g.terminal.comparator == "ge"
+        return self.classification_up_to_k2().to_dict(descending=descending)
+
+    def solve_19_20_21(self, lazy: bool = True) -> dict:
+        """
+        Ответы 19–21. При lazy=True разметка строится блоками и
+        прекращается, как только все три ответа найдены.
+        """
+        if lazy:
+            return collect_answers(self.iter_blocks())
+
+        return self.classification_up_to_k2().answers_19_20_21()
+
+    def is_subtract_only(self) -> bool:
+        g = self.g
+        return (g.terminal.comparator == "le" and bool(g.moves)
+                and all(isinstance(m, SubtractMove) and m.k > 0 for m in g.moves))
+
+    def periodic_pattern(self, full: bool = False, max_prefix: int = 1 << 20) -> PeriodicPattern:
+        """
+        Разметка всех s > T для игр только с ходами SubtractMove и 'le'.
+
+        Метка s зависит лишь от меток s - k, то есть от окна из max(k)
+        предыдущих состояний, поэтому после первого повтора окна разметка
+        периодична. При full=False размечается как classification_up_to_k2,
+        при full=True — как classification(): там окна сравниваются с
+        точностью до чётного сдвига, а глубина растёт на shift за период.
+        Найденный период дополнительно сверяется ещё на одном периоде.
+        """
+        if not self.is_subtract_only():
+            raise ValueError("periodic pattern needs a 'le' game with SubtractMove moves only")
+
+        lo = self.g.terminal.threshold + 1
+        steps = sorted({m.k for m in self.g.moves})
+        width = steps[-1]
+
+        codes = bytearray()
+        plies: List[int] = []
+
+        def grow(n: int) -> None:
+            old = len(plies)
+            if n <= old:
+                return
+
+            if full:
+                for i in range(old, n):
+                    succ = [plies[i - k] if i >= k else 0 for k in steps]
+                    even = [p for p in succ if p % 2 == 0]
+                    plies.append(1 + min(even) if even else 1 + max(succ))
+            else:
+                codes.extend(bytes(n - old))
+                self._walk(codes, lo, lo + n - 1, range(lo + old, lo + n))
+                plies.extend(c if c else -1 for c in codes[old:n])
+
+        # окно -> (индекс состояния после окна, чётная база окна)
+        seen: Dict[tuple, Tuple[int, int]] = {}
+        i = width
+
+        while True:
+            if i > len(plies):
+                if len(plies) >= max_prefix:
+                    raise ValueError(f"no period found within {max_prefix} states")
+                grow(min(max(2 * len(plies), FIRST_BLOCK, width), max_prefix))
                 continue
 
-            labels[s] = "UNRESOLVED"
+            window = plies[i - width:i]
+            base = min(window) // 2 * 2 if full else 0
+            key = tuple(p - base for p in window)
+            if key in seen:
+                break
+
+            seen[key] = (i, base)
+            i += 1
+
+        start, first_base = seen[key]
+        period, shift = i - start, base - first_base
+
+        grow(i + period)
+        for t in range(period):
+            p = plies[start + t]
+            if plies[i + t] != (p + shift if p >= 0 else p):
+                raise RuntimeError("periodic pattern check failed")
+
+        return PeriodicPattern(lo, start, period, shift, np.array(plies[:i], dtype=np.int64))
+
+    def classification(self, max_depth: int | None = None) -> Classification:
+        """
+        Ретроградный анализ всех s ∈ [s_min, s_max]: 'W{k}' (выигрыш k-м
+        своим ходом), 'L{k}' (проигрыш, соперник выигрывает своим k-м ходом),
+        'DRAW' (игра зацикливается) или 'UNRESOLVED'.
+
+        max_depth ограничивает k; None — анализ до неподвижной точки.
+        Монотонность ходов не требуется.
+        """
+        g = self.g
+        graph = StateGraph.for_game(g, g.s_min, g.s_max)
+        plies = graph.retrograde(max_depth)
+        plies[graph.terminal] = 0
+        draws = graph.draws(plies) if max_depth is None else None
+
+        return Classification.from_plies(g.s_min, plies, draws)
+
+    def classify(self, max_depth: int | None = None) -> Tuple[Dict[int, str], Dict[int, int]]:
+        """
+        То же, что classification(), в виде словарей (labels, moves) без
+        терминальных позиций; moves[s] — число ходов обоих игроков до конца
+        при оптимальной игре.
+        """
+        result = self.classification(max_depth)
+        labels = result.to_dict()
+        plies = result.moves_to_end()
+
+        moves = {s: int(plies[s - result.s_min]) for s, label in labels.items()
+                 if label[0] in "WL"}
+
+        return labels, moves
+
+
+# ============== State graph ==============
+
+class StateGraph:
+    """
+    Явный граф состояний в формате CSR (обратные рёбра).
+
+    Состояния пронумерованы 0..n-1; succ[j, i] — номер состояния после
+    j-го хода из i либо TERMINAL/OUTSIDE. Ходы в терминальные позиции не
+    хранятся как рёбра: они сразу дают выигрыш в один ход. Ходы за пределы
+    таблицы учитываются только в счётчике ходов — значение таких позиций
+    неизвестно.
+    """
+
+    OUTSIDE = -1
+    TERMINAL = -2
+
+    def __init__(self, terminal: np.ndarray, succ: np.ndarray):
+        self.n = len(terminal)
+        self.terminal = terminal
+
+        # Одинаковые последователи считаем одним ходом, как в next_states
+        succ = np.sort(succ, axis=0)
+        unique = np.ones_like(succ, dtype=bool)
+        unique[1:] = succ[1:] != succ[:-1]
+
+        active = unique & ~terminal
+        inside = active & (succ >= 0)
+        outside = active & (succ == self.OUTSIDE)
+
+        self.wins_now = (active & (succ == self.TERMINAL)).any(axis=0)
+        self.outside = outside.any(axis=0)
+        self.counter = (inside | outside).sum(axis=0).astype(np.int64)
+
+        src = np.broadcast_to(np.arange(self.n), succ.shape)[inside]
+        dst = succ[inside]
+        order = np.argsort(dst, kind="stable")
+
+        self.pred_idx = src[order]
+        self.indptr = np.zeros(self.n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(dst, minlength=self.n), out=self.indptr[1:])
+
+    @classmethod
+    def for_game(cls, game: Game, lo: int, hi: int) -> StateGraph:
+        """Граф игры с одной кучей для s ∈ [lo, hi]; номер состояния — s - lo."""
+        t = game.terminal
+        n = max(hi - lo + 1, 0)
+
+        states = np.arange(lo, lo + n, dtype=np.int64)
+        dests = compile_moves(tuple(game.moves)).successors(states)
+
+        inside = (dests >= lo) & (dests < lo + n)
+        succ = np.where(inside, dests - lo, cls.OUTSIDE)
+        succ[t.is_terminal(dests)] = cls.TERMINAL
+
+        return cls(np.asarray(t.is_terminal(states), dtype=bool), succ)
+
+    def predecessors(self, nodes: np.ndarray) -> np.ndarray:
+        """Все предшественники nodes (с повторами) одним массивом."""
+        starts = self.indptr[nodes]
+        lengths = self.indptr[nodes + 1] - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64)
+
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        return self.pred_idx[offsets + np.arange(total)]
 
-        return labels
+    def retrograde(self, max_depth: int | None = None) -> np.ndarray:
+        """
+        Число ходов до конца игры для каждой вершины (-1 — не определено).
+
+        Вершины обрабатываются слоями по числу ходов: из слоя выигрышей
+        уменьшаются счётчики предшественников, из слоя проигрышей
+        предшественники сразу становятся выигрышными. Каждая вершина входит
+        ровно в один слой, так что каждое ребро просматривается один раз.
+
+        Широкие слои обрабатываются NumPy целиком, узкие — поштучно: в
+        длинных цепочках (вычитания по 1-2) слоёв почти столько же, сколько
+        вершин, и накладные расходы NumPy на слой во много раз больше работы.
+        """
+        max_plies = None if max_depth is None else 2 * max_depth
+        counter = self.counter.copy()
+        pred = ptr = None
+
+        plies = np.full(self.n, -1, dtype=np.int32)
+        frontier = np.flatnonzero(self.wins_now)
+        plies[frontier] = 1
+        p = 1
+
+        while len(frontier) and (max_plies is None or p < max_plies):
+            if len(frontier) >= SMALL_FRONTIER:
+                frontier = self._vector_layer(np.asarray(frontier), p % 2 == 1, plies, counter)
+                plies[frontier] = p + 1
+            else:
+                if pred is None:
+                    pred, ptr = self.pred_idx.tolist(), self.indptr.tolist()
+                frontier = self._scalar_layer(frontier, p, plies, counter, pred, ptr)
+            p += 1
+
+        return plies
+
+    def _vector_layer(self, frontier: np.ndarray, wins: bool,
+                      plies: np.ndarray, counter: np.ndarray) -> np.ndarray:
+        """Метод для получения следующего слоя по слою frontier средствами NumPy."""
+        preds = self.predecessors(frontier)
+        preds = preds[plies[preds] == -1]
+
+        if wins:
+            # Слой выигрышей: опровергаем ходы предшественников
+            nodes, hits = np.unique(preds, return_counts=True)
+            counter[nodes] -= hits
+            return nodes[counter[nodes] == 0]
+
+        # Слой проигрышей: есть ход в проигрышную для соперника позицию
+        return np.unique(preds)
+
+    @staticmethod
+    def _scalar_layer(frontier, p: int, plies: np.ndarray, counter: np.ndarray,
+                      pred: list, ptr: list) -> list:
+        """
+        Метод для получения следующего слоя по узкому слою frontier (слой p)
+        без NumPy; вершины нового слоя сразу получают plies = p + 1.
+        """
+        layer = []
+        for v in (frontier.tolist() if isinstance(frontier, np.ndarray) else frontier):
+            for u in pred[ptr[v]:ptr[v + 1]]:
+                if plies[u] != -1:
+                    continue
+                if p % 2 == 1:
+                    counter[u] -= 1
+                    if counter[u] > 0:
+                        continue
+                plies[u] = p + 1
+                layer.append(u)
+        return layer
+
+    def draws(self, plies: np.ndarray) -> np.ndarray:
+        """
+        Маска ничьих после полного ретроградного анализа.
+
+        Неразрешённая вершина — ничья, если из неё нельзя дойти по
+        неразрешённым вершинам до хода за пределы диапазона; иначе её
+        значение зависит от неизвестных позиций.
+        """
+        unresolved = (plies == -1) & ~self.terminal
+        tainted = unresolved & self.outside
 
-    def solve_19_20_21(self) -> dict:
-        labels = self.classify_up_to_k2()
+        frontier = np.flatnonzero(tainted)
+        while frontier.size:
+            preds = self.predecessors(frontier)
+            preds = np.unique(preds[unresolved[preds] & ~tainted[preds]])
+            tainted[preds] = True
+            frontier = preds
 
-        # 19: минимальный S в L1
-        s19 = min((s for s, lab in labels.items() if lab == "L1"), default=None)
+        return unresolved & ~tainted
 
-        # 20: два наименьших S в W2 (по определению уже не W1)
-        w2_list = sorted(s for s, lab in labels.items() if lab == "W2")
-        s20 = w2_list[:2]
 
-        # 21: минимальный S в L2 (не L1 по явному условию)
-        s21 = min((s for s, lab in labels.items() if lab == "L2"), default=None)
+# ============== Multi-pile games ==============
+
+@dataclass
+class PileGame:
+    """
+    Игра с несколькими кучами: состояние — кортеж размеров куч.
+    Ход применяется к любой одной куче, условие окончания проверяется
+    для суммы куч.
+    """
+    terminal: TerminalCondition
+    moves: List[Move]
+    bounds: List[Tuple[int, int]]  # (min, max) для каждой кучи
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return tuple(hi - lo + 1 for lo, hi in self.bounds)
+
+    def next_states(self, state: Tuple[int, ...]) -> List[Tuple[int, ...]]:
+        result = set()
+        for p, pile in enumerate(state):
+            for m in self.moves:
+                result.add(state[:p] + (m.apply(pile),) + state[p + 1:])
+
+        return sorted(result)
+
+
+class PileAnalyzer:
+    """
+    Ретроградный анализ PileGame по плотной таблице состояний.
+
+    Состояние хранится плоским индексом (np.ravel_multi_index по размерам
+    куч минус нижние границы), последователи считаются сразу для всей
+    таблицы, а метки расставляет StateGraph.
+    """
+
+    def __init__(self, game: PileGame):
+        self.g = game
+        self.shape = game.shape
+        self.graph = self._build_graph()
+
+    def index(self, state: Tuple[int, ...]) -> int:
+        """Плоский индекс состояния в таблице."""
+        coords = tuple(v - lo for v, (lo, _) in zip(state, self.g.bounds))
+        return int(np.ravel_multi_index(coords, self.shape))
+
+    def _build_graph(self) -> StateGraph:
+        g = self.g
+        t = g.terminal
+        n = int(np.prod(self.shape))
+
+        flat = np.arange(n, dtype=np.int64)
+        coords = np.unravel_index(flat, self.shape)
+        piles = [c.astype(np.int64) + lo for c, (lo, _) in zip(coords, g.bounds)]
+        total = np.sum(piles, axis=0)
 
-        return {"19": s19, "20": s20, "21": s21}
+        succ = np.empty((len(piles) * len(g.moves), n), dtype=np.int64)
+        row = 0
+
+        for p, (values, (lo, hi)) in enumerate(zip(piles, g.bounds)):
+            # Шаг плоского индекса при изменении p-й кучи на единицу
+            stride = int(np.prod(self.shape[p + 1:]))
+
+            for m in g.moves:
+                new = m.apply_array(values)
+                inside = (new >= lo) & (new <= hi)
+
+                succ[row] = np.where(inside, flat + (new - values) * stride, StateGraph.OUTSIDE)
+                succ[row][t.is_terminal(total - values + new)] = StateGraph.TERMINAL
+                row += 1
+
+        return StateGraph(np.asarray(t.is_terminal(total), dtype=bool), succ)
+
+    def classify(self, max_depth: int | None = None) -> np.ndarray:
+        """
+        Число ходов до конца игры для каждого состояния, форма — self.shape.
+        0 — игра уже окончена, -1 — значение не определено (ничья или
+        зависит от состояний за пределами bounds).
+        """
+        plies = self.graph.retrograde(max_depth)
+        plies[self.graph.terminal] = 0
+
+        return plies.reshape(self.shape)
+
+    def label(self, state: Tuple[int, ...], max_depth: int | None = None) -> str:
+        """Метка состояния: 'W{k}', 'L{k}', 'DRAW' или 'UNRESOLVED'."""
+        return self.labels_for([state], max_depth)[0]
+
+    def labels_for(self, states: List[Tuple[int, ...]], max_depth: int | None = None) -> List[str]:
+        plies = self.classify(max_depth).ravel()
+        draws = self.graph.draws(plies) if max_depth is None else np.zeros(self.graph.n, dtype=bool)
+
+        result = []
+        for state in states:
+            i = self.index(state)
+            p = int(plies[i])
+
+            if p == -1:
+                result.append("DRAW" if draws[i] else "UNRESOLVED")
+            elif p % 2 == 1:
+                result.append(f"W{(p + 1) // 2}")
+            else:
+                result.append(f"L{p // 2}")
+
+        return result
+
+    def solve_19_20_21(self, fixed: Dict[int, int]) -> dict:
+        """
+        Ответы 19–21 по единственной свободной куче, остальные кучи
+        заданы в fixed: {номер кучи: размер}.
+        """
+        free = [p for p in range(len(self.shape)) if p not in fixed]
+        if len(free) != 1:
+            raise ValueError("fixed must set all piles except one")
+
+        axis = free[0]
+        lo = self.g.bounds[axis][0]
+        index = tuple(slice(None) if p == axis else fixed[p] - self.g.bounds[p][0]
+                      for p in range(len(self.shape)))
+        line = self.classify(max_depth=2)[index]
+
+        # Число ходов: 2 — L1, 3 — W2, 4 — L2
+        l1 = np.flatnonzero(line == 2) + lo
+        w2 = np.flatnonzero(line == 3) + lo
+        l2 = np.flatnonzero(line == 4) + lo
+
+        return {
+            "19": int(l1[0]) if len(l1) else None,
+            "20": w2[:2].tolist(),
+            "21": int(l2[0]) if len(l2) else None,
+        }
+
+
+# ============== Serialization ==============
+
+_MOVE_RE = re.compile(r"(\+|-|\*|//)(\d+)(?:\((floor|ceil|round)\))?")
+
+
+def parse_move(name: str) -> Move:
+    """Ход по его имени (Move.name): '+1', '-3', '*2', '//4', '//4(ceil)'."""
+    match = _MOVE_RE.fullmatch(name.replace(" ", ""))
+    if not match:
+        raise ValueError(f"Unknown move: {name!r}")
+
+    op, value, mode = match.group(1), int(match.group(2)), match.group(3)
+    if value <= 0:
+        # +0/-0 не сдвигают s, *0 и //0 не имеют смысла
+        raise ValueError(f"Move value must be positive: {name!r}")
+
+    if op == "+":
+        return AddMove(value)
+    elif op == "-":
+        return SubtractMove(value)
+    elif op == "*":
+        return MultiplyMove(value)
+    else:
+        return DivideMove(value, mode=mode or "floor")
+
+
+def game_to_dict(game: Game) -> dict:
+    """JSON-совместимое описание игры (FuncMove не сериализуется)."""
+    for m in game.moves:
+        if isinstance(m, FuncMove):
+            raise ValueError(f"FuncMove {m.name!r} can't be serialized")
+
+    return {
+        "terminal": {"threshold": game.terminal.threshold, "comparator": game.terminal.comparator},
+        "moves": [m.name for m in game.moves],
+        "s_min": game.s_min,
+        "s_max": game.s_max,
+        "monotonic": game.monotonic,
+    }
+
+
+def game_from_dict(data: dict) -> Game:
+    terminal = data["terminal"]
+    return Game(
+        terminal=TerminalCondition(threshold=terminal["threshold"],
+                                   comparator=terminal.get("comparator", "le")),
+        moves=[parse_move(name) for name in data["moves"]],
+        s_min=data["s_min"],
+        s_max=data["s_max"],
+        monotonic=data.get("monotonic", "decreasing"),
+    )
 
 
 # ============== Пример использования под вашу игру ==============
@@ -1,11 +1,20 @@
 import sys
+from dataclasses import replace
+
+import numpy as np
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt, QThread, pyqtSignal
+from PyQt5.QtGui import QColor
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout,
                              QWidget, QGroupBox, QLabel, QSpinBox, QComboBox,
                              QPushButton, QListWidget, QListWidgetItem, QLineEdit,
                              QTabWidget, QTextEdit, QMessageBox, QFormLayout,
-                             QDialog, QDialogButtonBox)
+                             QDialog, QDialogButtonBox, QProgressBar, QTableView,
+                             QHeaderView, QAbstractItemView)
 from auto_solver import *
+from array_analyzer import ArrayAnalyzer
 
+# Верхняя граница для S и порога в полях ввода (QSpinBox хранит int32)
+MAX_STATE = 10 ** 9
 
 
 class MoveDialog(QDialog):
@@ -71,7 +80,7 @@ class TerminalConditionWidget(QGroupBox):
         self.comparator.addItems(["<=", ">="])
 
         self.threshold = QSpinBox()
-        self.threshold.setRange(0, 10000)
+        self.threshold.setRange(0, MAX_STATE)
         self.threshold.setValue(30)
 
         layout.addWidget(QLabel("Окончание игры когда S"))
@@ -148,11 +157,11 @@ class AnalysisSettingsWidget(QGroupBox):
         layout = QFormLayout()
 
         self.s_min = QSpinBox()
-        self.s_min.setRange(0, 10000)
+        self.s_min.setRange(0, MAX_STATE)
         self.s_min.setValue(31)
 
         self.s_max = QSpinBox()
-        self.s_max.setRange(1, 10000)
+        self.s_max.setRange(1, MAX_STATE)
         self.s_max.setValue(600)
 
         self.monotonic = QComboBox()
@@ -165,7 +174,83 @@ class AnalysisSettingsWidget(QGroupBox):
         self.setLayout(layout)
 
 
+class LabelTableModel(QAbstractTableModel):
+    """
+    Таблица «S — метка» поверх Classification.
+
+    Строки не хранятся: data() читает метку из массивов только для тех
+    ячеек, которые сейчас видны. При фильтре по метке хранится лишь массив
+    индексов подходящих состояний.
+    """
+
+    HEADERS = ["S", "Метка"]
+    COLORS = {"W": QColor("green"), "L": QColor("red")}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.classification = None
+        self.rows = None  # индексы s - s_min при фильтре, None — все состояния
+
+    def set_classification(self, classification, label=None):
+        self.beginResetModel()
+        self.classification = classification
+        self.rows = None
+        if classification is not None and label is not None:
+            self.rows = np.flatnonzero(classification.mask(label))
+        self.endResetModel()
+
+    def set_filter(self, label):
+        self.set_classification(self.classification, label)
+
+    def state_at(self, row):
+        offset = row if self.rows is None else int(self.rows[row])
+        return self.classification.s_min + offset
+
+    def row_of_state(self, s):
+        """Строка с состоянием s или ближайшим следующим, -1 — если такой нет."""
+        c = self.classification
+        if c is None:
+            return -1
+
+        offset = max(s - c.s_min, 0)
+        if self.rows is None:
+            return offset if offset < len(c) else -1
+
+        row = int(np.searchsorted(self.rows, offset))
+        return row if row < len(self.rows) else -1
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.classification is None:
+            return 0
+
+        return len(self.classification) if self.rows is None else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        s = self.state_at(index.row())
+
+        if role == Qt.DisplayRole:
+            return str(s) if index.column() == 0 else self.classification.label(s)
+        if role == Qt.ForegroundRole and index.column() == 1:
+            return self.COLORS.get(self.classification.label(s)[0])
+
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+
+        return None
+
+
 class ResultsWidget(QGroupBox):
+    FILTERS = ["Все", "W1", "L1", "W2", "L2", "UNRESOLVED"]
+
     def __init__(self):
         super().__init__("Результаты")
         self.init_ui()
@@ -175,8 +260,38 @@ class ResultsWidget(QGroupBox):
 
         self.results_text = QTextEdit()
         self.results_text.setReadOnly(True)
+        self.results_text.setMaximumHeight(120)
+
+        self.filter_box = QComboBox()
+        self.filter_box.addItems(self.FILTERS)
+        self.filter_box.currentTextChanged.connect(self.on_filter_changed)
+
+        self.jump_input = QSpinBox()
+        self.jump_input.setRange(0, 2 ** 31 - 1)
+
+        jump_btn = QPushButton("Перейти к S")
+        jump_btn.clicked.connect(self.jump_to_state)
+
+        controls_layout = QHBoxLayout()
+        controls_layout.addWidget(QLabel("Метка:"))
+        controls_layout.addWidget(self.filter_box)
+        controls_layout.addStretch()
+        controls_layout.addWidget(self.jump_input)
+        controls_layout.addWidget(jump_btn)
+
+        self.model = LabelTableModel(self)
+
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        # Фиксированная высота строк: иначе представление измеряет все строки
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.horizontalHeader().setStretchLastSection(True)
 
         layout.addWidget(self.results_text)
+        layout.addLayout(controls_layout)
+        layout.addWidget(self.table)
         self.setLayout(layout)
 
     def update_results(self, results, full_analysis=None):
@@ -186,6 +301,100 @@ class ResultsWidget(QGroupBox):
         text += f"<b>Задание 21 (мин L2):</b> {results['21']}<br/>"
 
         self.results_text.setHtml(text)
+        self.model.set_classification(full_analysis, self._current_filter())
+
+    def _current_filter(self):
+        label = self.filter_box.currentText()
+        return None if label == "Все" else label
+
+    def on_filter_changed(self, _):
+        self.model.set_filter(self._current_filter())
+
+    def jump_to_state(self):
+        row = self.model.row_of_state(self.jump_input.value())
+        if row < 0:
+            return
+
+        index = self.model.index(row, 0)
+        self.table.scrollTo(index, QAbstractItemView.PositionAtTop)
+        self.table.selectRow(row)
+
+
+# На сколько кусков делить разметку: между кусками отправляется progress
+# и проверяется запрос на отмену
+PROGRESS_STEPS = 100
+
+
+class AnalysisWorker(QThread):
+    """
+    Анализ игры в фоновом потоке.
+
+    Для игр с условием 'le' и убывающими ходами разметка наращивается
+    через ArrayAnalyzer.extend кусками в 1/PROGRESS_STEPS диапазона (не
+    меньше FIRST_BLOCK состояний): после каждого куска отправляется
+    progress и проверяется запрос на отмену.
+    Остальные игры, а также 'le'-игры, ходы которых на деле не убывают,
+    размечаются за один шаг.
+    """
+
+    progress = pyqtSignal(int, int)
+    done = pyqtSignal(object, object, object)  # analyzer, results, classification
+    failed = pyqtSignal(str)
+
+    def __init__(self, game, analyzer=None, parent=None):
+        super().__init__(parent)
+        self.game = game
+        self.analyzer = analyzer
+
+    def run(self):
+        try:
+            analyzer = self._analyze()
+            if analyzer is None:
+                return
+
+            classification = analyzer.classification_up_to_k2()
+            self.done.emit(analyzer, classification.answers_19_20_21(), classification)
+
+        except Exception as e:
+            self.failed.emit(str(e))
+
+    def _analyze(self):
+        game = self.game
+        lo, hi = Analyzer(game).walk_range()
+        total = max(hi - lo + 1, 0)
+        chunk = max(total // PROGRESS_STEPS, FIRST_BLOCK)
+
+        if game.terminal.comparator != "le" or game.monotonic != "decreasing":
+            return self._analyze_at_once(game, total)
+
+        # Если изменился только s_max, продолжаем прошлый анализ
+        prev = self.analyzer
+        if prev is not None and replace(prev.g, s_max=game.s_max) == game and prev.hi <= hi:
+            analyzer = prev
+        else:
+            analyzer = ArrayAnalyzer(replace(game, s_max=min(game.s_max, lo + chunk - 1)))
+
+        while True:
+            analyzer.label_codes()
+            if not analyzer._valid:
+                # Ходы на самом деле не убывают: каждое продолжение пересчитывало
+                # бы весь граф заново, так что размечаем весь диапазон сразу
+                return self._analyze_at_once(game, total)
+
+            self.progress.emit(max(analyzer.hi - lo + 1, 0), total)
+
+            if analyzer.g.s_max >= game.s_max:
+                return analyzer
+            if self.isInterruptionRequested():
+                return None
+
+            analyzer.extend(min(game.s_max, analyzer.g.s_max + chunk))
+
+    def _analyze_at_once(self, game, total):
+        analyzer = ArrayAnalyzer(game)
+        analyzer.label_codes()
+        self.progress.emit(total, total)
+        return analyzer
 
 
 class GameAnalyzerGUI(QMainWindow):
@@ -193,6 +402,8 @@ class GameAnalyzerGUI(QMainWindow):
         super().__init__()
         self.setWindowTitle("Солвер 19-21 задание ЕГЭ")
         self.setGeometry(100, 100, 800, 600)
+        self.analyzer = None
+        self.worker = None
         self.init_ui()
 
     def init_ui(self):
@@ -209,6 +420,18 @@ class GameAnalyzerGUI(QMainWindow):
         self.analyze_btn = QPushButton("Проанализировать игру")
         self.analyze_btn.clicked.connect(self.analyze_game)
 
+        self.cancel_btn = QPushButton("Отменить")
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.clicked.connect(self.cancel_analysis)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+
+        analyze_layout = QHBoxLayout()
+        analyze_layout.addWidget(self.analyze_btn)
+        analyze_layout.addWidget(self.cancel_btn)
+
         tab_widget = QTabWidget()
 
         config_tab = QWidget()
@@ -216,7 +439,8 @@ class GameAnalyzerGUI(QMainWindow):
         config_layout.addWidget(self.terminal_widget)
         config_layout.addWidget(self.moves_widget)
         config_layout.addWidget(self.settings_widget)
-        config_layout.addWidget(self.analyze_btn)
+        config_layout.addLayout(analyze_layout)
+        config_layout.addWidget(self.progress_bar)
         config_tab.setLayout(config_layout)
 
         results_tab = QWidget()
@@ -231,6 +455,9 @@ class GameAnalyzerGUI(QMainWindow):
         central_widget.setLayout(main_layout)
 
     def analyze_game(self):
+        if self.worker is not None:
+            return
+
         try:
             terminal_condition = self.terminal_widget.get_condition()
             moves = self.moves_widget.get_moves()
@@ -250,14 +477,47 @@ class GameAnalyzerGUI(QMainWindow):
                 monotonic=self._get_monotonic(),
             )
 
-            analyzer = Analyzer(game)
-            results = analyzer.solve_19_20_21()
-            full_analysis = analyzer.classify_up_to_k2()
-
-            self.results_widget.update_results(results, full_analysis)
-
         except Exception as e:
             QMessageBox.critical(self, "AnalysisError", f"Ошибка анализа игры: {str(e)}")
+            return
+
+        self.worker = AnalysisWorker(game, self.analyzer, self)
+        self.worker.progress.connect(self.on_progress)
+        self.worker.done.connect(self.on_analysis_done)
+        self.worker.failed.connect(self.on_analysis_failed)
+        self.worker.finished.connect(self.on_worker_finished)
+
+        self.progress_bar.setValue(0)
+        self.analyze_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
+        self.worker.start()
+
+    def cancel_analysis(self):
+        if self.worker is not None:
+            self.worker.requestInterruption()
+
+    def on_progress(self, done, total):
+        self.progress_bar.setValue(100 * done // total if total else 100)
+
+    def on_analysis_done(self, analyzer, results, full_analysis):
+        self.analyzer = analyzer
+        self.results_widget.update_results(results, full_analysis)
+
+    def on_analysis_failed(self, message):
+        QMessageBox.critical(self, "AnalysisError", f"Ошибка анализа игры: {message}")
+
+    def on_worker_finished(self):
+        self.worker.deleteLater()
+        self.worker = None
+        self.analyze_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(False)
+
+    def closeEvent(self, event):
+        if self.worker is not None:
+            self.worker.requestInterruption()
+            self.worker.wait()
+
+        super().closeEvent(event)
 
     def _get_monotonic(self):
         monotonic = self.settings_widget.monotonic.currentText()
@@ -0,0 +1,108 @@
+"""
+Пакетное решение заданий 19–21 для множества игр.
+
+Игры читаются из JSON lines (по одной на строку, формат game_to_dict),
+разбираются и решаются в пуле процессов и выводятся в том же порядке:
+
+    python batch.py games.jsonl -o answers.jsonl -j 8
+
+Строка с ошибкой (не JSON, не объект, неверная игра) даёт запись с полем
+"error" и не прерывает остальные.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool
+from typing import Iterable, Iterator
+
+from auto_solver import game_from_dict
+from array_analyzer import ArrayAnalyzer, clear_successor_tables
+
+
+def solve_spec(spec: dict) -> dict:
+    """
+    Решает одну игру; ошибки описания возвращаются в поле 'error', чтобы
+    одна плохая запись не прерывала весь пакет.
+    """
+    if not isinstance(spec, dict):
+        return {"input": spec, "error": "spec must be a JSON object"}
+
+    try:
+        answers = ArrayAnalyzer(game_from_dict(spec)).solve_19_20_21()
+    except Exception as e:
+        return {**spec, "error": f"{type(e).__name__}: {e}"}
+    finally:
+        # В банке задач игры почти не повторяются, так что кеш таблиц в
+        # процессе пула только занимал бы память
+        clear_successor_tables()
+
+    return {**spec, "answers": answers}
+
+
+def solve_line(line: str) -> dict:
+    """Разбирает строку JSON lines и решает записанную в ней игру."""
+    try:
+        spec = json.loads(line)
+    except json.JSONDecodeError as e:
+        return {"input": line.strip(), "error": f"invalid JSON: {e}"}
+
+    return solve_spec(spec)
+
+
+def solve_lines(lines: list) -> list:
+    """Решает пачку строк в одном процессе пула."""
+    return [solve_line(line) for line in lines]
+
+
+def solve_batch(lines: Iterable[str], processes: int | None = None,
+                chunksize: int = 64) -> Iterator[dict]:
+    """
+    Решает игры из строк JSON lines в пуле процессов и отдаёт результаты
+    по порядку; разбор JSON тоже выполняется в процессах пула. Пустые
+    строки пропускаются.
+
+    В работе держится не больше 4 пачек на процесс: новая пачка подаётся,
+    как только отдана самая старая, так что процессы не ждут отставшую
+    пачку, а в памяти лежит лишь небольшая часть входа и выхода.
+    """
+    processes = processes or os.cpu_count() or 1
+    lines = (line for line in lines if line.strip())
+    pending = deque()
+
+    with Pool(processes) as pool:
+        while chunk := list(islice(lines, chunksize)):
+            if len(pending) >= processes * 4:
+                yield from pending.popleft().get()
+            pending.append(pool.apply_async(solve_lines, (chunk,)))
+
+        while pending:
+            yield from pending.popleft().get()
+
+
+def main(argv: list | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Пакетное решение заданий 19–21")
+    parser.add_argument("input", nargs="?", default="-", help="JSON lines с играми ('-' — stdin)")
+    parser.add_argument("-o", "--output", default="-", help="куда писать ответы ('-' — stdout)")
+    parser.add_argument("-j", "--processes", type=int, default=None, help="число процессов")
+    parser.add_argument("--chunksize", type=int, default=64, help="игр в одной пачке для процесса")
+    args = parser.parse_args(argv)
+
+    src = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+
+    try:
+        for result in solve_batch(src, args.processes, args.chunksize):
+            dst.write(json.dumps(result, ensure_ascii=False) + "\n")
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Замеры скорости анализатора 19–21 на наборе игр и диапазонов s_max.
+
+    python benchmark.py -o bench.json
+    python benchmark.py --s-max 1000 100000 --compare bench.json
+
+Для каждой пары (игра, s_max) и каждого движка замеряется время разметки
+и решения 19–21 (лучшее из --repeat), число состояний в секунду и пиковая
+память (tracemalloc, отдельным прогоном). Результаты сохраняются в JSON.
+
+Ленивое решение останавливается, как только найдены все ответы, и
+размечает заранее неизвестную часть диапазона, поэтому скорость в
+состояниях в секунду для него не считается.
+"""
+from __future__ import annotations
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List
+
+import numpy as np
+
+import array_analyzer
+from auto_solver import (AddMove, Analyzer, DivideMove, Game, MultiplyMove, SubtractMove,
+                         TerminalCondition)
+from array_analyzer import ArrayAnalyzer
+
+
+def decreasing_game(s_max: int) -> Game:
+    # Как build_current_game
+    return Game(TerminalCondition(30, "le"), [SubtractMove(3), SubtractMove(5), DivideMove(4)],
+                31, s_max, "decreasing")
+
+
+def increasing_game(s_max: int) -> Game:
+    return Game(TerminalCondition(s_max + 1, "ge"), [AddMove(1), MultiplyMove(2)],
+                1, s_max, "increasing")
+
+
+def divide_game(mode: str) -> Callable[[int], Game]:
+    def build(s_max: int) -> Game:
+        return Game(TerminalCondition(20, "le"), [SubtractMove(2), DivideMove(3, mode=mode)],
+                    21, s_max, "decreasing")
+
+    return build
+
+
+GAMES: Dict[str, Callable[[int], Game]] = {
+    "decreasing": decreasing_game,
+    "increasing": increasing_game,
+    "divide-floor": divide_game("floor"),
+    "divide-ceil": divide_game("ceil"),
+    "divide-round": divide_game("round"),
+}
+
+ENGINES = {
+    "python": Analyzer,
+    "array": ArrayAnalyzer,
+}
+
+TASKS = {
+    "classify": lambda analyzer: analyzer.classification_up_to_k2(),
+    "solve": lambda analyzer: analyzer.solve_19_20_21(lazy=False),
+    "solve-lazy": lambda analyzer: analyzer.solve_19_20_21(),
+}
+
+# Задачи, которые размечают весь диапазон состояний
+FULL_RANGE_TASKS = {"classify", "solve"}
+
+
+def run_once(engine, game: Game, task: str) -> float:
+    # Кеш таблиц последователей сбрасывается, чтобы мерить полный расчёт
+    array_analyzer.clear_successor_tables()
+
+    start = time.perf_counter()
+    TASKS[task](engine(game))
+    return time.perf_counter() - start
+
+
+def peak_memory(engine, game: Game, task: str) -> int:
+    array_analyzer.clear_successor_tables()
+
+    tracemalloc.start()
+    try:
+        TASKS[task](engine(game))
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(games: List[str], engines: List[str], tasks: List[str], sizes: List[int],
+        repeat: int, python_limit: int) -> List[dict]:
+    results = []
+
+    for game_name in games:
+        for s_max in sizes:
+            game = GAMES[game_name](s_max)
+            lo, hi = Analyzer(game).walk_range()
+            states = max(hi - lo + 1, 0)
+
+            for engine_name in engines:
+                if engine_name == "python" and states > python_limit:
+                    continue
+
+                engine = ENGINES[engine_name]
+                for task in tasks:
+                    seconds = min(run_once(engine, game, task) for _ in range(repeat))
+                    row = {
+                        "game": game_name,
+                        "engine": engine_name,
+                        "task": task,
+                        "s_max": s_max,
+                        "states": states,
+                        "seconds": seconds,
+                        "states_per_sec": (states / seconds if seconds and task in FULL_RANGE_TASKS
+                                           else None),
+                        "peak_bytes": peak_memory(engine, game, task),
+                    }
+                    results.append(row)
+                    print_row(row)
+
+    return results
+
+
+def print_row(row: dict, baseline: dict | None = None) -> None:
+    rate = row["states_per_sec"]
+    rate = f"{rate:>14,.0f}" if rate is not None else f"{'—':>14}"
+    line = (f"{row['game']:<14} {row['engine']:<6} {row['task']:<10} {row['s_max']:>10} "
+            f"{row['seconds'] * 1000:>10.2f} ms {rate} st/s "
+            f"{row['peak_bytes'] / 2 ** 20:>9.1f} MiB")
+
+    if baseline is not None:
+        line += f"  x{baseline['seconds'] / row['seconds']:.2f} vs baseline"
+
+    print(line, flush=True)
+
+
+def compare(results: List[dict], path: str) -> None:
+    """Печатает ускорение относительно ранее сохранённого прогона."""
+    with open(path, encoding="utf-8") as f:
+        old = json.load(f)["results"]
+
+    key = lambda r: (r["game"], r["engine"], r["task"], r["s_max"])
+    baseline = {key(r): r for r in old}
+
+    print(f"\nСравнение с {path}:")
+    for row in results:
+        if key(row) in baseline:
+            print_row(row, baseline[key(row)])
+
+
+def main(argv: list | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк анализатора 19–21")
+    parser.add_argument("--games", nargs="+", default=list(GAMES), choices=list(GAMES))
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument("--tasks", nargs="+", default=list(TASKS), choices=list(TASKS))
+    parser.add_argument("--s-max", nargs="+", type=int, dest="sizes",
+                        default=[10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7])
+    parser.add_argument("--repeat", type=int, default=3, help="повторов на замер (берётся лучший)")
+    parser.add_argument("--python-limit", type=int, default=10 ** 5,
+                        help="максимум состояний для чистого Python-движка")
+    parser.add_argument("-o", "--output", help="куда сохранить результаты в JSON")
+    parser.add_argument("--compare", help="JSON прошлого прогона для сравнения")
+    args = parser.parse_args(argv)
+
+    results = run(args.games, args.engines, args.tasks, args.sizes, args.repeat, args.python_limit)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "python": sys.version.split()[0],
+                "numpy": np.__version__,
+                "platform": platform.platform(),
+                "results": results,
+            }, f, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
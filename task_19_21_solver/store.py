@@ -0,0 +1,149 @@
+"""
+Дисковый кеш результатов анализа 19–21.
+
+Ключ — SHA-256 канонического описания игры (game_to_dict: условие окончания,
+ходы, границы) и вида разметки. Массивы Classification хранятся в .npy и
+при повторном открытии отображаются в память (mmap) без пересчёта.
+Когда суммарный размер превышает лимит, удаляются давно не открывавшиеся
+записи.
+
+    store = ResultStore()
+    cl = store.classification(build_current_game(s_max=10 ** 7))
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import List, Tuple
+
+import numpy as np
+
+from auto_solver import Analyzer, Classification, Game, game_to_dict
+from array_analyzer import ArrayAnalyzer
+
+
+# Версия формата записи; при смене меняются все ключи
+FORMAT_VERSION = 1
+
+DEFAULT_ROOT = os.environ.get(
+    "TASK_19_21_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "task_19_21_solver"))
+DEFAULT_MAX_BYTES = 1 << 30
+
+# Вид разметки -> как её посчитать
+KINDS = {
+    "k2": lambda game: ArrayAnalyzer(game).classification_up_to_k2(),
+    "full": lambda game: Analyzer(game).classification(),
+}
+
+
+def game_key(game: Game, kind: str = "k2") -> str:
+    """Хеш канонической сериализации игры (FuncMove не поддерживается)."""
+    if kind not in KINDS:
+        raise ValueError(f"Unknown kind: {kind!r}")
+
+    canonical = json.dumps({"game": game_to_dict(game), "kind": kind, "version": FORMAT_VERSION},
+                           sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _load_array(path: str) -> np.ndarray:
+    try:
+        return np.load(path, mmap_mode="r")
+    except ValueError:
+        # Пустой массив отобразить в память нельзя
+        return np.load(path)
+
+
+class ResultStore:
+    """Каталог root/<ключ>/ с values.npy, depth.npy и meta.json."""
+
+    def __init__(self, root: str = DEFAULT_ROOT, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def load(self, game: Game, kind: str = "k2") -> Classification | None:
+        path = self._path(game_key(game, kind))
+
+        try:
+            with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            values = _load_array(os.path.join(path, "values.npy"))
+            depth = _load_array(os.path.join(path, "depth.npy"))
+        except (OSError, ValueError):
+            return None
+
+        # Время изменения каталога — время последнего обращения для LRU
+        os.utime(path)
+        return Classification(meta["s_min"], values, depth)
+
+    def save(self, game: Game, classification: Classification, kind: str = "k2") -> None:
+        path = self._path(game_key(game, kind))
+
+        # Запись собирается во временном каталоге и появляется целиком
+        tmp = tempfile.mkdtemp(dir=self.root, prefix=".tmp-")
+        try:
+            np.save(os.path.join(tmp, "values.npy"), np.ascontiguousarray(classification.values))
+            np.save(os.path.join(tmp, "depth.npy"), np.ascontiguousarray(classification.depth))
+            with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump({"s_min": classification.s_min, "kind": kind,
+                           "game": game_to_dict(game)}, f, ensure_ascii=False)
+
+            os.replace(tmp, path)
+        except OSError:
+            # Ту же игру уже записал другой процесс
+            if not os.path.isdir(path):
+                raise
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        self.evict()
+
+    def classification(self, game: Game, kind: str = "k2") -> Classification:
+        """Разметка из кеша; при промахе считается и сохраняется."""
+        cached = self.load(game, kind)
+        if cached is not None:
+            return cached
+
+        result = KINDS[kind](game)
+        self.save(game, result, kind)
+        return result
+
+    def entries(self) -> List[Tuple[float, int, str]]:
+        """(время обращения, размер в байтах, путь) для каждой записи."""
+        result = []
+        for name in os.listdir(self.root):
+            path = self._path(name)
+            if name.startswith(".") or not os.path.isdir(path):
+                continue
+
+            try:
+                size = sum(e.stat().st_size for e in os.scandir(path))
+                result.append((os.stat(path).st_mtime, size, path))
+            except OSError:
+                continue
+
+        return result
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self) -> None:
+        """Удаляет самые давние записи, пока кеш не уложится в max_bytes."""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def clear(self) -> None:
+        for _, _, path in self.entries():
+            shutil.rmtree(path, ignore_errors=True)
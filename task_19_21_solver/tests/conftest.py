@@ -0,0 +1,48 @@
+"""
+Модули задания импортируются напрямую (from auto_solver import ...), как
+при запуске из папки задания.
+"""
+import sys
+from pathlib import Path
+
+SOLVER_DIR = Path(__file__).resolve().parents[1]
+
+# Модули задания, импортированные тестами этой папки
+_modules = {}
+
+
+def _is_own(module) -> bool:
+    return Path(getattr(module, "__file__", None) or "").resolve().parent == SOLVER_DIR
+
+
+def _use_solver_dir():
+    # У заданий есть одноимённые модули (auto_solver, batch): при общем
+    # запуске pytest убираем из кеша модули другого задания и возвращаем
+    # свои, чтобы pickle и пул процессов находили те же классы и функции
+    for path in SOLVER_DIR.glob("*.py"):
+        module = sys.modules.get(path.stem)
+        if module is not None and not _is_own(module):
+            del sys.modules[path.stem]
+    sys.modules.update(_modules)
+
+    if str(SOLVER_DIR) in sys.path:
+        sys.path.remove(str(SOLVER_DIR))
+    sys.path.insert(0, str(SOLVER_DIR))
+
+
+_use_solver_dir()
+
+
+def pytest_collectstart(collector):
+    _use_solver_dir()
+
+
+def pytest_collectreport(report):
+    for path in SOLVER_DIR.glob("*.py"):
+        module = sys.modules.get(path.stem)
+        if module is not None and _is_own(module):
+            _modules[path.stem] = module
+
+
+def pytest_runtest_setup(item):
+    _use_solver_dir()
@@ -0,0 +1,73 @@
+"""
+Эталонная разметка игр прямым перебором по определению меток W{k}/L{k}.
+
+Считается по словарям без NumPy, поэтому годится только для небольших игр.
+"""
+
+
+def reference_labels(states, next_states, is_terminal, max_depth=None):
+    """
+    Метки состояний states по слоям числа ходов p до конца игры: выигрыш за
+    p (нечётное) — есть ход в проигрыш за p - 1; проигрыш за p (чётное) —
+    все ходы ведут в выигрыши, худший из них за p - 1. Ход за пределы states
+    (не в терминал) делает значение неизвестным.
+    """
+    states = list(states)
+    inside = set(states)
+    plies = {s: 0 for s in states if is_terminal(s)}
+    moves = {s: next_states(s) for s in states if s not in plies}
+
+    def value(d):
+        return 0 if is_terminal(d) else plies.get(d)
+
+    p = 0
+    while max_depth is None or p < 2 * max_depth:
+        p += 1
+        layer = []
+
+        for s, dests in moves.items():
+            if s in plies:
+                continue
+
+            values = [value(d) for d in dests]
+            if p % 2 == 1 and p - 1 in values:
+                layer.append(s)
+            elif (p % 2 == 0 and values and None not in values
+                  and all(v % 2 == 1 for v in values) and max(values) == p - 1):
+                layer.append(s)
+
+        if not layer:
+            break
+        plies.update((s, p) for s in layer)
+
+    # Ничья — из неразрешённой позиции нельзя по неразрешённым уйти за states
+    tainted = {s for s, dests in moves.items() if s not in plies
+               and any(d not in inside and not is_terminal(d) for d in dests)}
+    changed = True
+    while changed:
+        changed = False
+        for s, dests in moves.items():
+            if s not in plies and s not in tainted and any(d in tainted for d in dests):
+                tainted.add(s)
+                changed = True
+
+    labels = {}
+    for s in states:
+        if s in plies:
+            p = plies[s]
+            labels[s] = f"W{(p + 1) // 2}" if p % 2 else f"L{p // 2}"
+        elif max_depth is None and s not in tainted:
+            labels[s] = "DRAW"
+        else:
+            labels[s] = "UNRESOLVED"
+
+    return labels
+
+
+def reference_answers(labels):
+    def first(label, k):
+        return sorted(s for s, lab in labels.items() if lab == label)[:k]
+
+    return {"19": (first("L1", 1) or [None])[0],
+            "20": first("W2", 2),
+            "21": (first("L2", 1) or [None])[0]}
@@ -0,0 +1,172 @@
+"""
+Сверка анализаторов с прямым перебором по определению меток W{k}/L{k}.
+
+Игры генерируются случайно (с фиксированным seed) и небольшими, чтобы
+эталон можно было считать по словарям без NumPy.
+"""
+import itertools
+import pickle
+import random
+
+import numpy as np
+import pytest
+
+from array_analyzer import ArrayAnalyzer
+from auto_solver import (AddMove, Analyzer, DivideMove, FuncMove, Game, MultiplyMove,
+                         PileAnalyzer, PileGame, SubtractMove, TerminalCondition,
+                         build_current_game)
+from reference import reference_answers, reference_labels
+
+SEEDS = range(40)
+KINDS = ["le", "ge", "mixed"]
+
+
+def random_game(rng, kind):
+    if kind == "le":
+        threshold = rng.randint(0, 30)
+        moves = [SubtractMove(k) for k in rng.sample(range(1, 8), rng.randint(1, 3))]
+        if rng.random() < 0.5:
+            moves.append(DivideMove(rng.randint(2, 4), mode=rng.choice(["floor", "ceil", "round"])))
+        return Game(TerminalCondition(threshold, "le"), moves, threshold + 1,
+                    threshold + rng.randint(1, 300), "decreasing")
+
+    if kind == "ge":
+        threshold = rng.randint(20, 400)
+        moves = [AddMove(k) for k in rng.sample(range(1, 8), rng.randint(1, 3))]
+        if rng.random() < 0.5:
+            moves.append(MultiplyMove(rng.randint(2, 3)))
+        return Game(TerminalCondition(threshold, "ge"), moves, rng.randint(1, 10),
+                    threshold + 50, "increasing")
+
+    if kind == "mixed":
+        # Немонотонная игра: ход-перемешивание внутри [0, s_max] даёт циклы
+        threshold = rng.randint(0, 20)
+        s_max = threshold + rng.randint(1, 120)
+        a, c = rng.randint(2, 9), rng.randint(0, s_max)
+        moves = [SubtractMove(rng.randint(1, 6)),
+                 FuncMove(lambda s: (s * a + c) % (s_max + 1), label=f"({a}s+{c})%{s_max + 1}",
+                          vectorized=rng.random() < 0.5)]
+        if rng.random() < 0.5:
+            moves.append(AddMove(rng.randint(1, 4)))
+        return Game(TerminalCondition(threshold, "le"), moves, 0, s_max, "decreasing")
+
+    raise ValueError(f"Unknown game kind: {kind!r}")
+
+
+def up_to_k2_reference(game):
+    lo, hi = Analyzer(game).walk_range()
+    return reference_labels(range(lo, hi + 1), game.next_states,
+                            game.terminal.is_terminal, max_depth=2)
+
+
+@pytest.mark.parametrize("engine", [Analyzer, ArrayAnalyzer])
+@pytest.mark.parametrize("kind", KINDS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_up_to_k2_matches_reference(engine, kind, seed):
+    game = random_game(random.Random(seed), kind)
+    expected = up_to_k2_reference(game)
+
+    assert engine(game).classify_up_to_k2() == expected
+
+    answers = reference_answers(expected)
+    assert engine(game).solve_19_20_21(lazy=True) == answers
+    assert engine(game).solve_19_20_21(lazy=False) == answers
+
+
+@pytest.mark.parametrize("kind", KINDS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_array_extend_matches_fresh(kind, seed):
+    game = random_game(random.Random(seed), kind)
+    grown = Game(game.terminal, game.moves, game.s_min, game.s_max + 200, game.monotonic)
+
+    analyzer = ArrayAnalyzer(game)
+    analyzer.classify_up_to_k2()
+    analyzer.extend(grown.s_max)
+
+    assert analyzer.classify_up_to_k2() == up_to_k2_reference(grown)
+
+
+@pytest.mark.parametrize("kind", KINDS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_full_classification_matches_reference(kind, seed):
+    game = random_game(random.Random(seed), kind)
+    expected = reference_labels(range(game.s_min, game.s_max + 1), game.next_states,
+                                game.terminal.is_terminal)
+
+    result = Analyzer(game).classification()
+    assert {s: result.label(s) for s in range(game.s_min, game.s_max + 1)} == expected
+
+
+def test_deep_chain_classification():
+    # Слоёв почти столько же, сколько состояний: каждый слой — одна вершина
+    threshold, n = 30, 300_000
+    game = Game(TerminalCondition(threshold, "le"), [SubtractMove(1), SubtractMove(2)],
+                threshold + 1, threshold + n)
+
+    result = Analyzer(game).classification()
+
+    for d in (1, 2, 3, 4, n - 1, n):
+        expected = f"L{d // 3}" if d % 3 == 0 else f"W{d // 3 + 1}"
+        assert result.label(threshold + d) == expected
+    assert result.count("W") == n - n // 3
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_periodic_pattern_matches_reference(seed):
+    rng = random.Random(seed)
+    threshold = rng.randint(0, 30)
+    moves = [SubtractMove(k) for k in rng.sample(range(1, 12), rng.randint(1, 4))]
+    game = Game(TerminalCondition(threshold, "le"), moves, threshold + 1, threshold + 400)
+    states = range(game.s_min, game.s_max + 1)
+
+    expected = reference_labels(states, game.next_states, game.terminal.is_terminal, max_depth=2)
+    pattern = Analyzer(game).periodic_pattern()
+    assert pattern.classification(game.s_max).to_dict() == expected
+    assert pattern.answers_19_20_21(game.s_max) == reference_answers(expected)
+
+    expected = reference_labels(states, game.next_states, game.terminal.is_terminal)
+    pattern = Analyzer(game).periodic_pattern(full=True)
+    assert {s: pattern.label(s) for s in states} == expected
+
+@pytest.mark.parametrize("seed", range(10))
+def test_pile_analyzer_matches_reference(seed):
+    rng = random.Random(seed)
+    bounds = [(rng.randint(1, 3), rng.randint(8, 20)) for _ in range(2)]
+    moves = [AddMove(rng.randint(1, 3)), MultiplyMove(2)]
+    game = PileGame(TerminalCondition(rng.randint(20, 40), "ge"), moves, bounds)
+
+    states = list(itertools.product(*(range(lo, hi + 1) for lo, hi in bounds)))
+    expected = reference_labels(states, game.next_states, lambda s: game.terminal.is_terminal(sum(s)))
+
+    assert PileAnalyzer(game).labels_for(states) == [expected[s] for s in states]
+
+
+def test_func_move_without_array_support():
+    # f работает только с int: анализ должен вызывать его поэлементно
+    moves = [AddMove(1), FuncMove(lambda s: s + s.bit_length())]
+    game = Game(TerminalCondition(60, "ge"), moves, 1, 59, "increasing")
+
+    assert Analyzer(game).classify_up_to_k2() == up_to_k2_reference(game)
+
+
+def test_vectorized_func_move():
+    move = FuncMove(lambda s: s * 2, vectorized=True)
+    states = np.arange(10, dtype=np.int64)
+
+    assert move.apply_array(states).tolist() == [move.apply(int(s)) for s in states]
+
+
+@pytest.mark.parametrize("mode", ["floor", "ceil", "round"])
+def test_divide_move_modes(mode):
+    move = DivideMove(4, mode=mode)
+    states = np.arange(-20, 21, dtype=np.int64)
+
+    assert move.apply_array(states).tolist() == [move.apply(int(s)) for s in states]
+    assert pickle.loads(pickle.dumps(move)).apply(10) == move.apply(10)
+
+
+def test_game_is_picklable():
+    game = build_current_game(s_max=200)
+
+    assert Analyzer(pickle.loads(pickle.dumps(game))).solve_19_20_21() == \
+        Analyzer(game).solve_19_20_21()
@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from batch import solve_batch, solve_line, solve_spec
+
+GAME = {"terminal": {"threshold": 30}, "moves": ["-3", "-5", "//4"], "s_min": 31, "s_max": 200}
+ANSWERS = {"19": 124, "20": [127, 128], "21": 132}
+
+
+def test_solve_spec():
+    assert solve_spec(GAME)["answers"] == ANSWERS
+
+
+@pytest.mark.parametrize("spec", [5, [1, 2], "game", {"moves": []},
+                                  {**GAME, "moves": ["-3", "//0"]}, {**GAME, "moves": ["*0"]}])
+def test_bad_spec_gives_error(spec):
+    assert "error" in solve_spec(spec)
+
+
+def test_bad_json_line_gives_error():
+    assert "error" in solve_line('{"moves": [')
+    assert "error" in solve_line("5")
+
+
+def test_spec_with_error_field_is_solved():
+    assert solve_spec({**GAME, "error": "stale"})["answers"] == ANSWERS
+
+
+def test_solve_batch_keeps_order():
+    games = [{**GAME, "s_max": s_max} for s_max in range(120, 200, 7)]
+    lines = [json.dumps(game) for game in games]
+    lines[3] = "not json"
+    lines.insert(5, "  \n")
+
+    results = list(solve_batch(lines, processes=2, chunksize=2))
+
+    assert len(results) == len(games)
+    assert "error" in results[3]
+    for game, result in zip(games, results):
+        if result is not results[3]:
+            assert result["answers"] == solve_spec(game)["answers"]
@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+
+from auto_solver import (DivideMove, Game, SubtractMove, TerminalCondition,
+                         build_current_game)
+from store import ResultStore, game_key
+
+
+def test_round_trip_is_memory_mapped(tmp_path):
+    store = ResultStore(str(tmp_path))
+    game = build_current_game(s_max=300)
+
+    computed = store.classification(game)
+    loaded = store.load(game)
+
+    assert isinstance(loaded.values, np.memmap)
+    assert loaded.s_min == computed.s_min
+    assert loaded.to_dict() == computed.to_dict()
+
+
+def test_missing_entry_is_none(tmp_path):
+    assert ResultStore(str(tmp_path)).load(build_current_game(s_max=300)) is None
+
+
+def test_game_key():
+    game = build_current_game(s_max=300)
+
+    assert game_key(game) == game_key(build_current_game(s_max=300))
+    assert game_key(game) != game_key(game, "full")
+    assert game_key(game) != game_key(build_current_game(s_max=301))
+
+    moves = [SubtractMove(3), SubtractMove(5), DivideMove(4, mode="ceil")]
+    assert game_key(game) != game_key(Game(TerminalCondition(30, "le"), moves, 31, 300))
+
+
+def test_evicts_least_recently_used(tmp_path):
+    store = ResultStore(str(tmp_path))
+    games = [build_current_game(s_max=s_max) for s_max in (1000, 1001, 1002)]
+    for game in games:
+        store.classification(game)
+
+    # Явные времена обращения: games[1] — самая давняя запись, games[0] — следующая
+    for t, game in zip((200, 100, 300), games):
+        os.utime(os.path.join(store.root, game_key(game)), (t, t))
+
+    sizes = {path: size for _, size, path in store.entries()}
+    store.max_bytes = store.size() - 1
+    store.evict()
+
+    assert store.load(games[1]) is None
+    assert store.load(games[0]) is not None
+    assert store.load(games[2]) is not None
+
+    # load обновляет время обращения: games[2] становится свежее games[0]
+    for t, game in zip((100, 50), (games[0], games[2])):
+        os.utime(os.path.join(store.root, game_key(game)), (t, t))
+    store.load(games[2])
+    store.max_bytes = max(sizes.values())
+    store.evict()
+
+    assert store.load(games[0]) is None
+    assert store.load(games[2]) is not None
+
+
+def test_save_keeps_entry_written_by_another_process(tmp_path):
+    store = ResultStore(str(tmp_path))
+    game = build_current_game(s_max=300)
+    first = store.classification(game)
+
+    # Повторная запись той же игры не должна падать и оставлять мусор
+    store.save(game, first)
+
+    assert store.load(game).to_dict() == first.to_dict()
+    assert [name for name in os.listdir(store.root) if name.startswith(".")] == []
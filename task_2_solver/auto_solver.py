@@ -1,103 +1,350 @@
-import itertools
-from typing import List, Tuple
+import math
+from itertools import islice
+from typing import Dict, Iterator, List, Tuple
+
+from expression import compile_expression
+from signature_index import SignatureIndex, table_key
+from truth_table import MAX_VARS, full_mask, permute_mask, truth_mask, variable_columns
 
 
 class AutoSolver:
     def __init__(self, expression: str, bool_table: List[List[bool]],
-                 answer_column: List[bool], variables: List[str]) -> None:
+                 answer_column: List[bool], variables: List[str],
+                 distinct_rows: bool = True, index: SignatureIndex | None = None) -> None:
         self.bool_table = bool_table
         self.answer_column = answer_column
 
-        self.expression = expression # = '{0} & {1}', будут побитовые операции
+        # Разные строки таблицы — разные наборы переменных
+        self.distinct_rows = distinct_rows
+
+        # Индекс уже решённых задач по сигнатуре функции
+        self.index = index
+
+        # Выражение разбирается один раз и хранится в виде '({0} and {1}) <= {2}'
+        self.expression = compile_expression(expression, tuple(variables)).source
         self.variables = variables
 
         self.var_count = len(variables)
+        if self.var_count > MAX_VARS:
+            raise ValueError(f'At most {MAX_VARS} variables are supported')
 
-    def _get_solutions(self, result: bool) -> List[Tuple[int, ...]]:
-        """Метод для получения всех вариантов комбинаций значений переменных. """
+        # Классы взаимозаменяемых переменных, считаются по требованию
+        self._classes = None
 
-        all_solutions = list(itertools.product([0,1 ], repeat=self.var_count))
+    def _get_solutions(self, result: bool) -> int:
+        """Метод для получения маски наборов значений переменных, на которых
+        выражение равно result (бит r — r-й набор itertools.product)."""
 
-        return [solution for solution in all_solutions if eval(self.expression.format(*solution)) == result]
+        mask = truth_mask(self.expression, self.var_count)
+        if not result:
+            mask ^= full_mask(self.var_count)
+
+        return mask
 
     def _get_var_result(self, index_permutation: Tuple[int, ...]) -> str:
         return ''.join([self.variables[i] for i in index_permutation])
 
-    def _check_permutation(self, solutions: List[Tuple[int, ...]],
-                           result_bool: bool) -> bool:
-        """Метод для проверки корректности перестановки решений."""
+    def _rows_matchable(self, candidates: List[int]) -> bool:
+        """Метод для проверки, что строкам таблицы можно сопоставить наборы.
 
-        full_solution_match = []
+        candidates[i] — маска наборов, подходящих строке i. При distinct_rows
+        наборы должны быть попарно различны: ищется паросочетание строк с
+        наборами (алгоритм Куна по битовым маскам)."""
 
-        table_indexes = [i for i in range(len(self.answer_column)) if result_bool == self.answer_column[i]]
-        bool_table_rows = [self.bool_table[i] for i in table_indexes]
+        if not candidates:
+            return True
+        if not all(candidates):
+            return False
+        if not self.distinct_rows:
+            return True
 
-        for table_row in bool_table_rows:
-            table_row_match = []
+        # По теореме Холла хватает, если у каждой строки не меньше кандидатов, чем строк
+        if min(bin(mask).count('1') for mask in candidates) >= len(candidates):
+            return True
 
-            for solution_row in solutions:
-                solution_match = True
+        owner: Dict[int, int] = {}
+        visited = 0
 
-                for i in range(len(solution_row)):
-                    if table_row[i] is not None and table_row[i] != solution_row[i]:
-                        solution_match = False
+        def augment(row: int) -> bool:
+            nonlocal visited
 
-                table_row_match.append(solution_match)
+            free = candidates[row] & ~visited
+            while free:
+                low = free & -free
+                free ^= low
 
-            full_solution_match.append(True in table_row_match)
+                if visited & low:
+                    continue
+                visited |= low
 
-        return False not in full_solution_match
+                assignment = low.bit_length() - 1
+                if assignment not in owner or augment(owner[assignment]):
+                    owner[assignment] = row
+                    return True
 
-    def _rearrange_solution(self, solutions: List[Tuple[int, ...]],
-                            index_permutation: Tuple[int, ...]) -> List[Tuple[int, ...]]:
-        """Метод для перестановки колонок решений по перестановке индексов."""
+            return False
 
-        return [tuple(row[i] for i in index_permutation) for row in solutions]
+        for row in range(len(candidates)):
+            visited = 0
+            if not augment(row):
+                return False
 
-    def _get_index_permutations(self) -> List[Tuple[int, ...]]:
-        """Метод для получения перестановки индексов колонок."""
+        return True
 
-        base_indexes = [i for i in range(self.var_count)]
+    def _initial_candidates(self) -> List[int]:
+        """Метод для получения масок наборов, подходящих каждой строке таблицы
+        по значению выражения."""
 
-        return list(itertools.permutations(base_indexes))
+        true_mask = self._get_solutions(result=True)
+        false_mask = self._get_solutions(result=False)
 
-    def get_answer(self) -> str | None:
-        """Метод для получения финального строкового ответа из
-        переменных."""
+        return [true_mask if answer else false_mask for answer in self.answer_column]
+
+    def _narrow(self, candidates: List[int], j: int, var: int) -> List[int] | None:
+        """Метод для сужения масок строк при сопоставлении столбца j переменной
+        var. Возвращает None, если какой-то строке не осталось наборов."""
+
+        column = variable_columns(self.var_count)[var]
+        inverse = full_mask(self.var_count) ^ column
+
+        narrowed = []
+        for row, mask in zip(self.bool_table, candidates):
+            if row[j] is not None:
+                mask &= column if row[j] else inverse
+                if not mask:
+                    return None
+            narrowed.append(mask)
+
+        return narrowed
+
+    def _variable_classes(self) -> List[int]:
+        """Метод для разбиения переменных на классы взаимозаменяемых: обмен
+        двух переменных одного класса не меняет таблицу истинности. Класс
+        обозначается наименьшей переменной в нём."""
+
+        if self._classes is not None:
+            return self._classes
+
+        n = self.var_count
+        mask = self._get_solutions(result=True)
+        classes = list(range(n))
+
+        for i in range(n):
+            if classes[i] != i:
+                continue
+
+            for j in range(i + 1, n):
+                if classes[j] != j:
+                    continue
+
+                transposition = list(range(n))
+                transposition[i], transposition[j] = j, i
+
+                if permute_mask(mask, n, transposition) == mask:
+                    classes[j] = i
+
+        self._classes = classes
+        return classes
+
+    def _column_blocks(self) -> List[int]:
+        """Метод для разбиения столбцов таблицы на блоки одинаковых столбцов.
+        Блок обозначается первым столбцом в нём."""
+
+        first: Dict[tuple, int] = {}
+
+        return [first.setdefault(tuple(row[j] for row in self.bool_table), j)
+                for j in range(self.var_count)]
+
+    def _match_columns(self, symmetric: bool = False) -> Iterator[Tuple[int, ...]]:
+        """Метод для перебора подходящих перестановок с отсечениями.
+
+        Столбцы таблицы по очереди сопоставляются свободным переменным. Для
+        каждой строки таблицы хранится маска наборов, ещё совместимых с уже
+        расставленными столбцами; если у какой-то строки она опустела, ветка
+        отбрасывается. Перестановки выдаются в том же порядке, что и
+        itertools.permutations.
+
+        При symmetric=True перебираются только представители классов
+        равноценных ответов: переменные одного класса и переменные в
+        одинаковых столбцах идут по возрастанию. Первый ответ при этом не
+        меняется — он и так наименьший в своём классе."""
+
+        n = self.var_count
+        permutation = []
+        used = [False] * n
+
+        classes = self._variable_classes() if symmetric else list(range(n))
+        blocks = self._column_blocks() if symmetric else list(range(n))
+
+        # Последняя (наибольшая) переменная, поставленная в класс / блок
+        class_last = [-1] * n
+        block_last = [-1] * n
+
+        def extend(j: int, candidates: List[int]) -> Iterator[Tuple[int, ...]]:
+            if j == n:
+                if self._rows_matchable(candidates):
+                    yield tuple(permutation)
+                return
+
+            block = blocks[j]
+
+            for var in range(n):
+                if used[var] or var < class_last[classes[var]] or var < block_last[block]:
+                    continue
+
+                narrowed = self._narrow(candidates, j, var)
+                if narrowed is None:
+                    continue
+
+                saved = class_last[classes[var]], block_last[block]
+                class_last[classes[var]], block_last[block] = var, var
+                used[var] = True
+                permutation.append(var)
 
-        is_few_answers = (True in self.answer_column) and (False in self.answer_column)
+                yield from extend(j + 1, narrowed)
 
-        if is_few_answers:
-            true_solutions = self._get_solutions(result=True)
-            false_solutions = self._get_solutions(result=False)
+                permutation.pop()
+                used[var] = False
+                class_last[classes[var]], block_last[block] = saved
 
-            index_permutations = self._get_index_permutations()
+        candidates = self._initial_candidates()
+        if all(candidates):
+            yield from extend(0, candidates)
 
-            for index_perm in index_permutations:
-                true_perm_solutions = self._rearrange_solution(solutions=true_solutions,
-                                                               index_permutation=index_perm)
-                false_perm_solutions = self._rearrange_solution(solutions=false_solutions,
-                                                                index_permutation=index_perm)
+    def _orbits(self) -> Iterator[Tuple[Tuple[int, ...], Dict[Tuple[int, int], int]]]:
+        """Метод для перебора классов равноценных ответов.
+
+        Класс задаётся числом переменных каждого класса в каждом блоке
+        одинаковых столбцов; выдаются пары (представитель, эти числа)."""
+
+        classes = self._variable_classes()
+        blocks = self._column_blocks()
+        seen = set()
+
+        for index_perm in self._match_columns(symmetric=True):
+            counts: Dict[Tuple[int, int], int] = {}
+            for j, var in enumerate(index_perm):
+                key = (blocks[j], classes[var])
+                counts[key] = counts.get(key, 0) + 1
+
+            signature = tuple(sorted(counts.items()))
+            if signature not in seen:
+                seen.add(signature)
+                yield index_perm, counts
+
+    def _orbit_members(self, counts: Dict[Tuple[int, int], int]) -> Iterator[Tuple[int, ...]]:
+        """Метод для перебора всех перестановок одного класса по возрастанию."""
+
+        n = self.var_count
+        classes = self._variable_classes()
+        blocks = self._column_blocks()
+
+        counts = dict(counts)
+        permutation = []
+        used = [False] * n
+
+        def extend(j: int) -> Iterator[Tuple[int, ...]]:
+            if j == n:
+                yield tuple(permutation)
+                return
+
+            for var in range(n):
+                key = (blocks[j], classes[var])
+                if used[var] or not counts.get(key):
+                    continue
+
+                counts[key] -= 1
+                used[var] = True
+                permutation.append(var)
+
+                yield from extend(j + 1)
+
+                permutation.pop()
+                used[var] = False
+                counts[key] += 1
+
+        yield from extend(0)
+
+    def iter_answers(self) -> Iterator[str]:
+        """Метод для ленивого перебора всех подходящих ответов."""
+
+        for index_perm in self._match_columns():
+            yield self._get_var_result(index_permutation=index_perm)
+
+    def iter_answer_groups(self, limit: int | None = None) -> Iterator[Tuple[str, List[str]]]:
+        """Метод для перебора ответов с точностью до симметрий: для каждого
+        класса выдаётся ответ и список равноценных ему (взаимозаменяемые
+        переменные выражения или одинаковые столбцы таблицы), не длиннее
+        limit."""
+
+        for index_perm, counts in self._orbits():
+            answer = self._get_var_result(index_permutation=index_perm)
+            members = (member for member in self._orbit_members(counts) if member != index_perm)
+            alternatives = [self._get_var_result(index_permutation=member)
+                            for member in islice(members, limit)]
+
+            yield answer, alternatives
+
+    def get_answer_with_alternatives(self, limit: int | None = None) -> Tuple[str | None, List[str]]:
+        """Метод для получения ответа вместе с равноценными ему (не больше
+        limit)."""
+
+        return next(self.iter_answer_groups(limit=limit), (None, []))
+
+    def count_solutions(self, limit: int | None = None) -> int:
+        """Метод для подсчёта подходящих перестановок (не больше limit).
+
+        Перестановки не строятся: перебираются только классы равноценных
+        ответов, а размер класса считается по формуле
+        П|класс|! · П|блок|! / П(число переменных класса в блоке)!."""
+
+        classes = self._variable_classes()
+        blocks = self._column_blocks()
+
+        symmetry = 1
+        for group in (classes, blocks):
+            for leader in set(group):
+                symmetry *= math.factorial(group.count(leader))
+
+        total = 0
+        for _, counts in self._orbits():
+            stabilizer = 1
+            for count in counts.values():
+                stabilizer *= math.factorial(count)
+
+            total += symmetry // stabilizer
+            if limit is not None and total >= limit:
+                return limit
+
+        return total
+
+    def is_unique(self) -> bool:
+        """Метод для проверки однозначности ответа; перебор останавливается
+        на втором найденном ответе."""
+
+        return self.count_solutions(limit=2) == 1
+
+    def get_answer(self) -> str | None:
+        """Метод для получения финального строкового ответа из
+        переменных."""
 
-                true_perm_solutions_check = self._check_permutation(solutions=true_perm_solutions,
-                                                                    result_bool=True)
-                false_perm_solutions_check = self._check_permutation(solutions=false_perm_solutions,
-                                                                     result_bool=False)
+        if self.index is not None:
+            key = table_key(self.bool_table, self.answer_column, self.distinct_rows)
 
-                if true_perm_solutions_check and false_perm_solutions_check:
-                    return self._get_var_result(index_permutation=index_perm)
+            index_perm = self.index.lookup(self.expression, self.var_count, key)
+            if index_perm is not None:
+                return self._get_var_result(index_permutation=index_perm)
 
-        else:
-            solutions = self._get_solutions(result=self.answer_column[0])
-            index_permutations = self._get_index_permutations()
+        index_perm = next(self._match_columns(symmetric=True), None)
+        if index_perm is None:
+            return None
 
-            for index_perm in index_permutations:
-                perm_solutions = self._rearrange_solution(solutions=solutions, index_permutation=index_perm)
-                perm_solutions_check = self._check_permutation(solutions=perm_solutions,
-                                                               result_bool=self.answer_column[0])
+        # В индекс попадают только однозначные ответы, чтобы ответ из индекса
+        # совпадал с найденным перебором
+        if self.index is not None and self.is_unique():
+            self.index.add(self.expression, self.var_count, key, index_perm)
 
-                if perm_solutions_check:
-                    return self._get_var_result(index_permutation=index_perm)
+        return self._get_var_result(index_permutation=index_perm)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,127 @@
+"""
+Пакетное решение задания 2 без интерфейса.
+
+Задачи читаются из JSON lines, по одной на строку:
+
+    {"expression": "(x ∧ y) → z", "variables": "xyz",
+     "table": [[true, null, false], ...], "answers": [true, ...]}
+
+Необязательные поля: "distinct_rows" (по умолчанию true) и "expected" —
+ожидаемый ответ для проверки банка задач. Строки разбираются и решаются
+в пуле процессов, ответы выводятся в порядке входа:
+
+    python batch.py problems.jsonl -o answers.jsonl -j 8
+
+Скомпилированные выражения и столбцы таблиц истинности кешируются в каждом
+процессе пула и переиспользуются задачами с тем же выражением. Строка с
+ошибкой (не JSON, не объект, неверная задача) даёт запись с полем "error"
+и не прерывает остальные.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool
+from typing import Iterable, Iterator
+
+from auto_solver import AutoSolver
+
+
+def solve_spec(spec: dict) -> dict:
+    """Решает одну задачу; ошибки описания возвращаются в поле 'error'."""
+    if not isinstance(spec, dict):
+        return {"input": spec, "error": "problem must be a JSON object"}
+
+    try:
+        solver = AutoSolver(expression=spec["expression"],
+                            bool_table=spec["table"],
+                            answer_column=spec["answers"],
+                            variables=list(spec["variables"]),
+                            distinct_rows=spec.get("distinct_rows", True))
+
+        answer = solver.get_answer()
+        result = {**spec, "answer": answer, "unique": answer is not None and solver.is_unique()}
+    except Exception as e:
+        return {**spec, "error": f"{type(e).__name__}: {e}"}
+
+    if "expected" in spec:
+        result["ok"] = answer == spec["expected"]
+
+    return result
+
+
+def solve_line(line: str) -> dict:
+    """Разбирает строку JSON lines и решает записанную в ней задачу."""
+    try:
+        spec = json.loads(line)
+    except json.JSONDecodeError as e:
+        return {"input": line, "error": f"invalid JSON: {e}"}
+
+    return solve_spec(spec)
+
+
+def read_specs(lines: Iterable[str]) -> Iterator[dict]:
+    """Задачи из JSON lines; строки, которые не удалось разобрать, пропускаются."""
+    for line in lines:
+        try:
+            spec = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+
+        if isinstance(spec, dict):
+            yield spec
+
+
+def solve_lines(lines: list) -> list:
+    """Решает пачку строк в одном процессе пула."""
+    return [solve_line(line) for line in lines]
+
+
+def solve_batch(lines: Iterable[str], processes: int | None = None,
+                chunksize: int = 256) -> Iterator[dict]:
+    """
+    Решает задачи из строк JSON lines в пуле процессов; разбор JSON тоже
+    выполняется в процессах пула. Пустые строки пропускаются.
+
+    В работе держится не больше 4 пачек на процесс: новая пачка подаётся,
+    как только отдана самая старая, так что процессы не простаивают до
+    конца всей порции, а вход читается по мере решения.
+    """
+    processes = processes or os.cpu_count() or 1
+    lines = (line for line in lines if line.strip())
+    pending = deque()
+
+    with Pool(processes) as pool:
+        while chunk := list(islice(lines, chunksize)):
+            if len(pending) >= processes * 4:
+                yield from pending.popleft().get()
+            pending.append(pool.apply_async(solve_lines, (chunk,)))
+
+        while pending:
+            yield from pending.popleft().get()
+
+
+def main(argv: list | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Пакетное решение задания 2")
+    parser.add_argument("input", nargs="?", default="-", type=argparse.FileType("r", encoding="utf-8"),
+                        help="JSON lines с задачами ('-' — stdin)")
+    parser.add_argument("-o", "--output", default="-", type=argparse.FileType("w", encoding="utf-8"),
+                        help="куда писать ответы ('-' — stdout)")
+    parser.add_argument("-j", "--processes", type=int, default=None, help="число процессов")
+    parser.add_argument("--chunksize", type=int, default=256, help="задач в одной пачке для процесса")
+    args = parser.parse_args(argv)
+
+    try:
+        for result in solve_batch(args.input, args.processes, args.chunksize):
+            args.output.write(json.dumps(result, ensure_ascii=False) + "\n")
+    finally:
+        for f in (args.input, args.output):
+            if f not in (sys.stdin, sys.stdout):
+                f.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Разбор логических выражений задания 2.
+
+Поддерживаются обозначения ¬ ∧ ∨ → ≡ (приоритет убывает в этом порядке,
+операции одного приоритета выполняются слева направо) и синтаксис Python
+(not/and/or, ==, <= и т. п.). Переменные задаются именами из списка
+variables или местами подстановки {i}.
+
+Выражение разбирается один раз в дерево ast из разрешённых узлов и
+приводится к виду '({0} and {1}) <= {2}', с которым работают AutoSolver и
+truth_table; произвольный код при этом не выполняется.
+"""
+import ast
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+from truth_table import compile_bitset, truth_mask
+
+# Символы, по которым выражение считается записанным в логических обозначениях
+LOGIC_SYMBOLS = "¬∧∨→≡"
+
+_TOKEN_RE = re.compile(r"\s*(?:\{(\d+)\}|([^\W\d]\w*)|(\d+)|(->|<->|==|<=|[¬∧∨→≡()!&|]))")
+
+_NOT = {"¬", "!", "not"}
+_AND = {"∧", "&", "and"}
+_OR = {"∨", "|", "or"}
+_IMPLIES = {"→", "->", "<="}
+_EQUIV = {"≡", "<->", "=="}
+
+_CONSTANTS = {"0": False, "1": True, "False": False, "True": True}
+
+
+@dataclass(frozen=True)
+class Expression:
+    """Скомпилированное выражение в виде строки с местами подстановки {i}."""
+    source: str
+    var_count: int
+
+    def truth_mask(self) -> int:
+        """Маска строк таблицы истинности, на которых выражение истинно."""
+        return truth_mask(self.source, self.var_count)
+
+    def __call__(self, *values: int) -> bool:
+        return bool(compile_bitset(self.source)(values, 1))
+
+
+def _variable(index: int, var_count: int) -> ast.Name:
+    if not 0 <= index < var_count:
+        raise ValueError(f"Variable index {index} is out of range")
+    return ast.Name(id=f"_v{index}", ctx=ast.Load())
+
+
+class _Parser:
+    """Рекурсивный спуск по логическим обозначениям."""
+
+    def __init__(self, text: str, variables: Sequence[str]):
+        self.variables = list(variables)
+        self.tokens: List[Tuple[str, str]] = []
+        self.pos = 0
+
+        text = text.rstrip()
+        i = 0
+        while i < len(text):
+            match = _TOKEN_RE.match(text, i)
+            if not match or match.end() == i:
+                raise ValueError(f"Unexpected character at {i}: {text[i:i + 1]!r}")
+
+            placeholder, name, number, op = match.groups()
+            if placeholder is not None:
+                self.tokens.append(("var", placeholder))
+            elif name is not None:
+                self.tokens.append(("op" if name in ("not", "and", "or") else "name", name))
+            elif number is not None:
+                self.tokens.append(("name", number))
+            else:
+                self.tokens.append(("op", op))
+
+            i = match.end()
+
+    def peek(self) -> str | None:
+        return self.tokens[self.pos][1] if self.pos < len(self.tokens) else None
+
+    def take(self) -> Tuple[str, str]:
+        if self.pos >= len(self.tokens):
+            raise ValueError("Unexpected end of expression")
+
+        self.pos += 1
+        return self.tokens[self.pos - 1]
+
+    def parse(self) -> ast.Expression:
+        tree = self.equiv()
+        if self.pos != len(self.tokens):
+            raise ValueError(f"Unexpected token: {self.peek()!r}")
+
+        return ast.Expression(body=tree)
+
+    def binary(self, operand, ops: set, build) -> ast.expr:
+        left = operand()
+        while self.peek() in ops and self.tokens[self.pos][0] == "op":
+            self.take()
+            left = build(left, operand())
+
+        return left
+
+    def equiv(self) -> ast.expr:
+        return self.binary(self.implies, _EQUIV,
+                           lambda a, b: ast.Compare(left=a, ops=[ast.Eq()], comparators=[b]))
+
+    def implies(self) -> ast.expr:
+        return self.binary(self.disjunction, _IMPLIES,
+                           lambda a, b: ast.Compare(left=a, ops=[ast.LtE()], comparators=[b]))
+
+    def disjunction(self) -> ast.expr:
+        return self.binary(self.conjunction, _OR,
+                           lambda a, b: ast.BoolOp(op=ast.Or(), values=[a, b]))
+
+    def conjunction(self) -> ast.expr:
+        return self.binary(self.unary, _AND,
+                           lambda a, b: ast.BoolOp(op=ast.And(), values=[a, b]))
+
+    def unary(self) -> ast.expr:
+        if self.peek() in _NOT and self.tokens[self.pos][0] == "op":
+            self.take()
+            return ast.UnaryOp(op=ast.Not(), operand=self.unary())
+
+        return self.atom()
+
+    def atom(self) -> ast.expr:
+        kind, value = self.take()
+
+        if kind == "op" and value == "(":
+            tree = self.equiv()
+            if self.take() != ("op", ")"):
+                raise ValueError("Missing ')'")
+            return tree
+
+        if kind == "var":
+            return _variable(int(value), len(self.variables))
+
+        if kind == "name":
+            if value in self.variables:
+                return _variable(self.variables.index(value), len(self.variables))
+            if value in _CONSTANTS:
+                return ast.Constant(value=_CONSTANTS[value])
+            raise ValueError(f"Unknown variable: {value!r}")
+
+        raise ValueError(f"Unexpected token: {value!r}")
+
+
+class _Renamer(ast.NodeTransformer):
+    """Заменяет имена переменных в выражении на Python на _v{i}."""
+
+    def __init__(self, variables: Sequence[str]):
+        self.variables = list(variables)
+
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+        if re.fullmatch(r"_v\d+", node.id):
+            return _variable(int(node.id[2:]), len(self.variables))
+        if node.id in self.variables:
+            return _variable(self.variables.index(node.id), len(self.variables))
+        if node.id in ("True", "False"):
+            return ast.Constant(value=node.id == "True")
+        raise ValueError(f"Unknown variable: {node.id!r}")
+
+
+@lru_cache(maxsize=256)
+def compile_expression(text: str, variables: Tuple[str, ...]) -> Expression:
+    """
+    Разбирает выражение над variables. Для синтаксиса Python места {i}
+    допускаются наравне с именами; ValueError — синтаксическая ошибка или
+    неразрешённая операция.
+    """
+    if any(symbol in text for symbol in LOGIC_SYMBOLS):
+        tree = _Parser(text, variables).parse()
+    else:
+        source = re.sub(r"\{(\d+)\}", lambda m: f"_v{m.group(1)}", text.strip())
+        try:
+            tree = ast.parse(source, mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"Syntax error: {e.msg}") from None
+
+        tree = _Renamer(variables).visit(tree)
+
+    source = re.sub(r"\b_v(\d+)\b", r"{\1}", ast.unparse(ast.fix_missing_locations(tree)))
+
+    # Проверка по списку разрешённых операций (ValueError при нарушении)
+    compile_bitset(source)
+
+    return Expression(source, len(variables))
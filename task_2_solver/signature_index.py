@@ -0,0 +1,177 @@
+"""
+Индекс решённых задач по канонической сигнатуре функции.
+
+Сигнатура — наименьшая маска таблицы истинности по всем перестановкам
+переменных, поэтому выражения, отличающиеся лишь именами или порядком
+переменных, получают одну запись. Для каждой сигнатуры хранятся примеры
+выражений и однозначные ответы для встречавшихся таблиц (столбец ->
+переменная канонической функции). Индекс сохраняется в gzip JSON:
+
+    python signature_index.py problems.jsonl -o index.json.gz
+"""
+from __future__ import annotations
+import argparse
+import gzip
+import json
+import os
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+from truth_table import adjacent_swap_masks, truth_mask
+
+# Больше переменных — слишком много перестановок для канонизации
+MAX_VARS = 8
+
+# Сколько примеров выражений хранить для одной сигнатуры
+MAX_EXPRESSIONS = 8
+
+
+@lru_cache(maxsize=None)
+def _adjacent_swaps(n: int) -> Tuple[int, ...]:
+    """
+    Последовательность соседних транспозиций (i, i + 1), обходящая все n!
+    перестановок (алгоритм Джонсона — Троттера).
+    """
+    if n <= 1:
+        return ()
+
+    inner = _adjacent_swaps(n - 1)
+    swaps: List[int] = []
+
+    for k in range(len(inner) + 1):
+        # Наибольший элемент проходит справа налево, затем слева направо,
+        # а между проходами делается очередной шаг для остальных
+        leftward = k % 2 == 0
+        swaps.extend(range(n - 2, -1, -1) if leftward else range(n - 1))
+        if k < len(inner):
+            swaps.append(inner[k] + (1 if leftward else 0))
+
+    return tuple(swaps)
+
+
+@lru_cache(maxsize=4096)
+def canonical_signature(mask: int, var_count: int) -> Tuple[int, Tuple[int, ...]]:
+    """
+    (наименьшая маска, order): переменная k канонической функции — это
+    переменная order[k] исходной.
+    """
+    swaps = adjacent_swap_masks(var_count)
+
+    order = list(range(var_count))
+    best = (mask, tuple(order))
+
+    for i in _adjacent_swaps(var_count):
+        # То же, что swap_adjacent, без лишних вызовов в горячем цикле
+        pairs, d = swaps[i]
+        t = ((mask >> d) ^ mask) & pairs
+        mask ^= t ^ (t << d)
+
+        order[i], order[i + 1] = order[i + 1], order[i]
+        if mask < best[0]:
+            best = (mask, tuple(order))
+
+    return best
+
+
+def table_key(bool_table: Sequence[Sequence[bool | None]], answer_column: Sequence[bool],
+              distinct_rows: bool = True) -> str:
+    """Строковый ключ таблицы: '1-0=1;...' ('-' — пустая ячейка)."""
+    rows = ["".join("-" if cell is None else "1" if cell else "0" for cell in row)
+            + ("=1" if answer else "=0")
+            for row, answer in zip(bool_table, answer_column)]
+
+    return ";".join(rows) + ("" if distinct_rows else ";any")
+
+
+class SignatureIndex:
+    def __init__(self, path: str | None = None):
+        self.path = path
+        # 'n:маска в hex' -> {"expressions": [...], "answers": {ключ таблицы: [...]}}
+        self.signatures: Dict[str, dict] = {}
+
+        if path is not None and os.path.exists(path):
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                self.signatures = json.load(f)["signatures"]
+
+    @staticmethod
+    def _signature(expression: str, var_count: int) -> Tuple[str, Tuple[int, ...]] | None:
+        if var_count > MAX_VARS:
+            return None
+
+        mask, order = canonical_signature(truth_mask(expression, var_count), var_count)
+        return f"{var_count}:{mask:x}", order
+
+    def lookup(self, expression: str, var_count: int, key: str) -> Tuple[int, ...] | None:
+        """Перестановка-ответ (столбец -> индекс переменной) или None."""
+        signature = self._signature(expression, var_count)
+        if signature is None:
+            return None
+
+        entry = self.signatures.get(signature[0])
+        if entry is None or key not in entry["answers"]:
+            return None
+
+        order = signature[1]
+        return tuple(order[k] for k in entry["answers"][key])
+
+    def add(self, expression: str, var_count: int, key: str,
+            index_permutation: Tuple[int, ...]) -> None:
+        """Запоминает однозначный ответ для выражения и таблицы."""
+        signature = self._signature(expression, var_count)
+        if signature is None:
+            return
+
+        name, order = signature
+        entry = self.signatures.setdefault(name, {"expressions": [], "answers": {}})
+
+        if expression not in entry["expressions"] and len(entry["expressions"]) < MAX_EXPRESSIONS:
+            entry["expressions"].append(expression)
+        entry["answers"][key] = [order.index(var) for var in index_permutation]
+
+    def expressions(self, expression: str, var_count: int) -> List[str]:
+        """Известные выражения с той же канонической функцией."""
+        signature = self._signature(expression, var_count)
+        if signature is None:
+            return []
+
+        return list(self.signatures.get(signature[0], {}).get("expressions", []))
+
+    def save(self, path: str | None = None) -> None:
+        path = path or self.path
+        tmp = path + ".tmp"
+
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump({"version": 1, "signatures": self.signatures}, f,
+                      ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+
+
+def main(argv: list | None = None) -> None:
+    from auto_solver import AutoSolver
+    from batch import read_specs
+
+    parser = argparse.ArgumentParser(description="Индекс сигнатур для задания 2")
+    parser.add_argument("input", help="JSON lines с задачами (формат batch.py)")
+    parser.add_argument("-o", "--output", default="index.json.gz", help="файл индекса")
+    args = parser.parse_args(argv)
+
+    index = SignatureIndex(args.output)
+
+    with open(args.input, encoding="utf-8") as f:
+        for spec in read_specs(f):
+            try:
+                AutoSolver(expression=spec["expression"],
+                           bool_table=spec["table"],
+                           answer_column=spec["answers"],
+                           variables=list(spec["variables"]),
+                           distinct_rows=spec.get("distinct_rows", True),
+                           index=index).get_answer()
+            except (IndexError, KeyError, TypeError, ValueError):
+                continue
+
+    index.save()
+    print(f"{len(index.signatures)} signatures -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
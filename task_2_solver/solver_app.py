@@ -4,6 +4,14 @@ from tkinter import messagebox
 
 from custom_ttk import ColoredCombobox
 from auto_solver import AutoSolver
+from expression import compile_expression
+
+# Задержка (мс) перед пересчётом ответа в режиме «решать на лету»: серия
+# быстрых правок даёт один пересчёт
+LIVE_SOLVE_DELAY = 150
+
+# Сколько равноценных ответов показывать рядом с основным
+SHOWN_ALTERNATIVES = 5
 
 
 class VirtualKeyboard:
@@ -28,6 +36,8 @@ class VirtualKeyboard:
         self.answer_widget = None
         self.table_matrix_frame = None
 
+        self.live_solve_job = None
+
         self.create_input_field()
         self.create_keyboard()
         self.create_input_matrix()
@@ -39,7 +49,11 @@ class VirtualKeyboard:
 
         ttk.Label(input_frame, text="Ввод:").pack(side=tk.LEFT)
 
-        self.table_expression = tk.Entry(input_frame, width=50, font=("Arial", 12))
+        self.expression_text = tk.StringVar()
+        self.expression_text.trace_add('write', self.schedule_live_solve)
+
+        self.table_expression = tk.Entry(input_frame, width=50, font=("Arial", 12),
+                                         textvariable=self.expression_text)
         self.table_expression.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(10, 0))
 
         ttk.Button(input_frame, text="Очистить", command=self.clear_table_expression).pack(side=tk.LEFT, padx=(10, 0))
@@ -49,7 +63,11 @@ class VirtualKeyboard:
 
         ttk.Label(add_frame, text="Добавить символы:").pack(side=tk.LEFT)
 
-        self.add_table_expression = tk.Entry(add_frame, width=30, font=("Arial", 10))
+        self.variables_text = tk.StringVar()
+        self.variables_text.trace_add('write', self.schedule_live_solve)
+
+        self.add_table_expression = tk.Entry(add_frame, width=30, font=("Arial", 10),
+                                             textvariable=self.variables_text)
         self.add_table_expression.pack(side=tk.LEFT, padx=(10, 0))
 
         ttk.Button(add_frame, text="Добавить", command=self.add_keys_from_string).pack(side=tk.LEFT, padx=(10, 0))
@@ -70,6 +88,10 @@ class VirtualKeyboard:
         ttk.Button(self.input_table_frame, text='Добавить матрицу', command=self.add_matrix).pack(side=tk.LEFT, padx=(10, 0))
         ttk.Button(self.input_table_frame, text='Удалить матрицу', command=self.delete_matrix).pack(side=tk.LEFT, padx=(10, 0))
 
+        self.live_solve = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.input_table_frame, text='Решать на лету', variable=self.live_solve,
+                        command=self.schedule_live_solve).pack(side=tk.LEFT, padx=(10, 0))
+
         self.answer_button = None
 
         self.answer_frame = ttk.Frame(self.root, padding='10')
@@ -93,6 +115,7 @@ class VirtualKeyboard:
                                                   state="readonly", width=15)
                         table_bool.set(self.default_combox_value)
                         table_bool.grid(row=i, column=j, padx=10, pady=10)
+                        table_bool.bind('<<ComboboxSelected>>', self.schedule_live_solve)
 
                         self.matrix_widgets[table_bool] = (i, j)
 
@@ -103,6 +126,7 @@ class VirtualKeyboard:
                         result_bool.set('True')
 
                         result_bool.grid(row=i, column=j, padx=10, pady=10)
+                        result_bool.selected_value.trace_add('write', self.schedule_live_solve)
 
                         self.result_widgets[result_bool] = (i, j)
 
@@ -110,10 +134,14 @@ class VirtualKeyboard:
                 self.answer_button = ttk.Button(self.input_table_frame, text='Решить', command=self.add_answer)
                 self.answer_button.pack(side=tk.RIGHT, padx=10)
 
+            self.schedule_live_solve()
+
         else:
             messagebox.showwarning('Предупреждение', 'Задайте размеры матрицы')
 
-    def get_table_answer(self):
+    def read_table(self):
+        """Метод для чтения значений таблицы из виджетов"""
+
         for widget in self.matrix_widgets.items():
             self.matrix_table[widget[1][0]][widget[1][1]] = self.get_bool_value(widget[0].get())
 
@@ -122,6 +150,9 @@ class VirtualKeyboard:
         for widget in self.result_widgets.items():
             self.result_table.append(self.get_bool_value(widget[0].get()))
 
+    def get_table_answer(self):
+        self.read_table()
+
         # print(self.process_expression(expression=self.table_expression.get()))
         # print(self.matrix_table)
         # print(self.result_table)
@@ -130,30 +161,82 @@ class VirtualKeyboard:
         table_answer = AutoSolver(expression=self.process_expression(expression=self.table_expression.get()),
                             bool_table=self.matrix_table,
                             answer_column=self.result_table,
-                            variables=list(self.add_table_expression.get())).get_answer()
+                            variables=list(self.add_table_expression.get())
+                            ).get_answer_with_alternatives(limit=SHOWN_ALTERNATIVES + 1)
 
         return table_answer
 
+    def format_answer(self, answer, alternatives) -> str:
+        """Метод для записи ответа вместе с равноценными ему"""
+
+        if not alternatives:
+            return answer
+
+        shown = ', '.join(alternatives[:SHOWN_ALTERNATIVES])
+        if len(alternatives) > SHOWN_ALTERNATIVES:
+            shown += ', …'
+
+        return f'{answer} (равноценно: {shown})'
+
     def add_answer(self):
-        if not self.answer_widget and '' not in [self.table_expression.get(), self.add_table_expression.get()]:
-            answer = self.get_table_answer()
+        if '' not in [self.table_expression.get(), self.add_table_expression.get()]:
+            try:
+                answer, alternatives = self.get_table_answer()
+            except ValueError as e:
+                messagebox.showwarning('Предупреждение', f'Некорректное выражение: {e}')
+                return
             # print(answer)
 
-            self.answer_widget = ttk.Label(text=answer, foreground='green')
-            self.answer_widget.pack(side=tk.LEFT, padx=10)
+            self.show_answer(text=self.format_answer(answer, alternatives), color='green')
 
         else:
             messagebox.showwarning('Предупреждение', 'Задайте выражение и/или переменные')
 
-    def process_expression(self, expression: str) -> str:
-        for i, var in enumerate(self.add_table_expression.get()):
-            expression = expression.replace(var, f'{{{i}}}')
+    def show_answer(self, text, color: str):
+        """Метод для вывода ответа: метка создаётся один раз и дальше обновляется"""
 
-        expression = expression.replace('→', '<=')
-        expression = expression.replace('∧', 'and')
-        expression = expression.replace('∨', 'or')
-        expression = expression.replace('¬', 'not ')
-        expression = expression.replace('≡', '==')
+        if not self.answer_widget:
+            self.answer_widget = ttk.Label(text=text, foreground=color)
+            self.answer_widget.pack(side=tk.LEFT, padx=10)
+
+        else:
+            self.answer_widget.config(text=text, foreground=color)
+
+    def schedule_live_solve(self, *args):
+        """Метод для отложенного пересчёта ответа в режиме «решать на лету»:
+        серия быстрых правок таблицы или выражения даёт один пересчёт"""
+
+        if self.live_solve_job is not None:
+            self.root.after_cancel(self.live_solve_job)
+            self.live_solve_job = None
+
+        if self.live_solve.get() and self.table_matrix_frame:
+            self.live_solve_job = self.root.after(LIVE_SOLVE_DELAY, self.live_solve_answer)
+
+    def live_solve_answer(self):
+        """Метод для пересчёта ответа по текущей таблице; выражение и его
+        таблица истинности берутся из кешей, так что пересчёт — это только
+        перебор столбцов с отсечениями"""
+
+        self.live_solve_job = None
+
+        if '' in [self.table_expression.get(), self.add_table_expression.get()]:
+            return
+
+        try:
+            answer, alternatives = self.get_table_answer()
+        except (IndexError, ValueError):
+            # Выражение ещё не дописано или не согласовано с таблицей
+            self.show_answer(text='Некорректное выражение', color='red')
+            return
+
+        if answer is None:
+            self.show_answer(text='Нет ответа', color='red')
+        else:
+            self.show_answer(text=self.format_answer(answer, alternatives), color='green')
+
+    def process_expression(self, expression: str) -> str:
+        expression = compile_expression(expression, tuple(self.add_table_expression.get())).source
 
         print(expression)
 
@@ -172,6 +255,8 @@ class VirtualKeyboard:
 
             self.table_matrix_frame = None
 
+            self.schedule_live_solve()
+
             self.answer_button.destroy()
             self.answer_button = None
 
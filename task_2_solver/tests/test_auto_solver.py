@@ -0,0 +1,141 @@
+"""
+Сверка AutoSolver с прямым перебором всех перестановок столбцов.
+
+Выражения генерируются случайно (с фиксированным seed) в синтаксисе Python
+и для эталона вычисляются обычным eval по всем наборам значений.
+"""
+import itertools
+import json
+import random
+
+import pytest
+
+from auto_solver import AutoSolver
+from batch import solve_batch, solve_line, solve_spec
+from expression import compile_expression
+from signature_index import SignatureIndex
+
+OPERATORS = ["and", "or", "==", "!=", "<="]
+
+
+def random_problem(rng, max_vars=5):
+    n = rng.randint(1, max_vars)
+    variables = list("xyzwv"[:n])
+
+    names = variables[:]
+    rng.shuffle(names)
+    expression = names[0]
+    for name in names[1:]:
+        operand = f"(not {name})" if rng.random() < 0.3 else name
+        expression = f"({expression} {rng.choice(OPERATORS)} {operand})"
+
+    rows = rng.randint(1, 4)
+    table = [[rng.choice([True, False, None]) for _ in range(n)] for _ in range(rows)]
+    answers = [rng.choice([True, False]) for _ in range(rows)]
+
+    return expression, variables, table, answers
+
+
+def brute_force(expression, variables, table, answers, distinct_rows=True):
+    """Все подходящие ответы в порядке itertools.permutations."""
+    n = len(variables)
+    value = {t: eval(expression, {}, dict(zip(variables, t)))
+             for t in itertools.product([False, True], repeat=n)}
+
+    def assign(options, used):
+        # Разным строкам — разные наборы (при distinct_rows)
+        if not options:
+            return True
+        return any(assign(options[1:], used | {t}) for t in options[0]
+                   if not distinct_rows or t not in used)
+
+    result = []
+    for permutation in itertools.permutations(range(n)):
+        options = [[t for t in value if value[t] == answer
+                    and all(cell is None or cell == t[permutation[j]] for j, cell in enumerate(row))]
+                   for row, answer in zip(table, answers)]
+
+        if assign(options, frozenset()):
+            result.append("".join(variables[i] for i in permutation))
+
+    return result
+
+
+@pytest.mark.parametrize("distinct_rows", [True, False])
+@pytest.mark.parametrize("seed", range(150))
+def test_matches_brute_force(seed, distinct_rows):
+    expression, variables, table, answers = random_problem(random.Random(seed))
+    expected = brute_force(expression, variables, table, answers, distinct_rows)
+
+    def solver():
+        return AutoSolver(expression, [row[:] for row in table], answers[:], variables, distinct_rows)
+
+    assert solver().get_answer() == (expected[0] if expected else None)
+    assert list(solver().iter_answers()) == expected
+    assert solver().count_solutions() == len(expected)
+    assert solver().is_unique() == (len(expected) == 1)
+
+    groups = list(solver().iter_answer_groups())
+    found = [answer for group in groups for answer in [group[0], *group[1]]]
+    assert sorted(found) == sorted(expected)
+    assert solver().get_answer_with_alternatives() == (groups[0] if groups else (None, []))
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_index_answers_match_brute_force(seed):
+    index = SignatureIndex()
+    expression, variables, table, answers = random_problem(random.Random(seed))
+    expected = brute_force(expression, variables, table, answers)
+
+    # Второй раз ответ берётся из индекса
+    for _ in range(2):
+        answer = AutoSolver(expression, table, answers, variables, index=index).get_answer()
+        assert answer == (expected[0] if expected else None)
+
+@pytest.mark.parametrize("text, python", [
+    ("¬x ∨ y → z ≡ w", "((((not x) or y) <= z) == w)"),
+    ("x → y → z", "((x <= y) <= z)"),
+    ("x ∧ ¬(y ∨ z) ≡ x ∨ w", "((x and not (y or z)) == (x or w))"),
+    ("x ≡ y ≡ z", "((x == y) == z)"),
+])
+def test_logic_symbols(text, python):
+    variables = ("x", "y", "z", "w")
+    expression = compile_expression(text, variables)
+
+    for values in itertools.product([False, True], repeat=4):
+        assert expression(*values) == eval(python, {}, dict(zip(variables, values)))
+
+
+@pytest.mark.parametrize("text", ["x ∧", "x ∧ q", "__import__('os')", "x + y"])
+def test_invalid_expression(text):
+    with pytest.raises(ValueError):
+        compile_expression(text, ("x", "y"))
+
+
+def test_batch_reports_bad_lines():
+    good = ('{"expression": "x ∧ ¬y", "variables": "xy", '
+            '"table": [[true, null]], "answers": [true], "expected": "xy"}')
+
+    assert solve_line(good)["ok"]
+    assert "error" in solve_line("{bad")
+    assert "error" in solve_line("5")
+    assert "error" in solve_spec({"expression": "x", "variables": "x"})
+
+
+def test_batch_keeps_order():
+    problems = [random_problem(random.Random(seed)) for seed in range(40)]
+    lines = [json.dumps({"expression": expression, "variables": "".join(variables),
+                         "table": table, "answers": answers})
+             for expression, variables, table, answers in problems]
+    lines[7] = "{bad"
+    lines.insert(10, "\n")
+
+    results = list(solve_batch(lines, processes=2, chunksize=3))
+
+    assert len(results) == len(problems)
+    for i, (result, problem) in enumerate(zip(results, problems)):
+        if i == 7:
+            assert "error" in result
+        else:
+            expected = brute_force(*problem)
+            assert result["answer"] == (expected[0] if expected else None)
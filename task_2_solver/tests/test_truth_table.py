@@ -0,0 +1,40 @@
+import itertools
+
+import random
+
+import pytest
+
+from truth_table import permute_mask, truth_mask
+
+EXPRESSIONS = [
+    "{0}",
+    "not {0}",
+    "({0} and not {1}) == {2}",
+    "({0} <= {1}) <= {2}",
+    "{0} != ({1} or {2} and not {3})",
+    "{0} <= {1} <= {2}",
+    "({0} > {1}) | ({2} ^ {3}) & {1}",
+]
+
+
+@pytest.mark.parametrize("expression", EXPRESSIONS)
+def test_truth_mask_matches_eval(expression):
+    n = 4
+    for r, values in enumerate(itertools.product([0, 1], repeat=n)):
+        expected = bool(eval(expression.format(*values)))
+        assert bool(truth_mask(expression, n) >> r & 1) == expected
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_permute_mask_matches_eval(seed):
+    rng = random.Random(seed)
+    n = rng.randint(1, 7)
+    expression = " != ".join(f"({{{i}}} or {{{(i + 1) % n}}})" for i in range(n))
+    permutation = rng.sample(range(n), n)
+
+    mask = permute_mask(truth_mask(expression, n), n, permutation)
+    for r, y in enumerate(itertools.product([0, 1], repeat=n)):
+        x = [0] * n
+        for j, var in enumerate(permutation):
+            x[var] = y[j]
+        assert bool(mask >> r & 1) == bool(eval(expression.format(*x)))
@@ -0,0 +1,147 @@
+"""
+Таблицы истинности в виде битовых масок.
+
+Строка r таблицы — r-й набор itertools.product([0, 1], repeat=n), то есть
+переменная i равна биту n - 1 - i номера строки. Столбец переменной — целое
+число из 2^n бит, где бит r равен её значению в строке r. Выражение
+компилируется один раз и вычисляется сразу для всех строк побитовыми
+операциями над столбцами.
+"""
+import ast
+import re
+from functools import lru_cache
+from typing import Callable, Sequence, Tuple
+
+_PLACEHOLDER_RE = re.compile(r"\{(\d+)\}")
+_VAR_RE = re.compile(r"_v(\d+)")
+
+
+@lru_cache(maxsize=None)
+def variable_columns(var_count: int) -> Tuple[int, ...]:
+    """Битовые столбцы переменных 0..var_count-1."""
+    rows = 1 << var_count
+    columns = []
+
+    for i in range(var_count):
+        half = 1 << (var_count - 1 - i)
+        # В каждом блоке из 2 * half строк переменная равна 1 во второй половине
+        column = ((1 << half) - 1) << half
+        width = 2 * half
+
+        while width < rows:
+            column |= column << width
+            width *= 2
+
+        columns.append(column)
+
+    return tuple(columns)
+
+
+def full_mask(var_count: int) -> int:
+    return (1 << (1 << var_count)) - 1
+
+
+# Таблицы до стольких переменных (2^16 бит на функцию) обрабатываются целиком
+MAX_VARS = 16
+
+
+@lru_cache(maxsize=None)
+def adjacent_swap_masks(var_count: int) -> Tuple[Tuple[int, int], ...]:
+    """
+    Для каждой пары переменных (i, i + 1) — маска строк, где x_i = 0 и
+    x_{i+1} = 1, и расстояние до парной строки с обменянными значениями.
+    """
+    columns = variable_columns(var_count)
+    return tuple((columns[i + 1] & ~columns[i], 1 << (var_count - 2 - i))
+                 for i in range(var_count - 1))
+
+
+def swap_adjacent(mask: int, var_count: int, i: int) -> int:
+    """Маска функции с обменянными переменными i и i + 1 (delta swap)."""
+    pairs, d = adjacent_swap_masks(var_count)[i]
+    t = ((mask >> d) ^ mask) & pairs
+    return mask ^ t ^ (t << d)
+
+
+def permute_mask(mask: int, var_count: int, permutation: Sequence[int]) -> int:
+    """
+    Маска функции g(y) = f(x), где x[permutation[j]] = y[j]: столбец j
+    новой таблицы — переменная permutation[j] исходной.
+    """
+    order = list(range(var_count))
+
+    for j, var in enumerate(permutation):
+        for i in range(order.index(var) - 1, j - 1, -1):
+            mask = swap_adjacent(mask, var_count, i)
+            order[i], order[i + 1] = order[i + 1], order[i]
+
+    return mask
+
+
+_COMPARE = {
+    ast.Eq: "(F ^ {0} ^ {1})",
+    ast.NotEq: "({0} ^ {1})",
+    ast.LtE: "((F ^ {0}) | {1})",
+    ast.GtE: "({0} | (F ^ {1}))",
+    ast.Lt: "((F ^ {0}) & {1})",
+    ast.Gt: "({0} & (F ^ {1}))",
+}
+
+_BINARY = {
+    ast.BitAnd: "&",
+    ast.BitOr: "|",
+    ast.BitXor: "^",
+}
+
+
+def _emit(node: ast.AST) -> str:
+    """Побитовый аналог логического выражения над значениями 0/1."""
+    if isinstance(node, ast.Expression):
+        return _emit(node.body)
+
+    if isinstance(node, ast.Name):
+        match = _VAR_RE.fullmatch(node.id)
+        if not match:
+            raise ValueError(f"Unknown name: {node.id!r}")
+        return f"v[{match.group(1)}]"
+
+    if isinstance(node, ast.Constant) and node.value in (0, 1) and not isinstance(node.value, float):
+        return "F" if node.value else "0"
+
+    if isinstance(node, ast.BoolOp):
+        op = " & " if isinstance(node.op, ast.And) else " | "
+        return "(" + op.join(_emit(value) for value in node.values) + ")"
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        return f"(F ^ {_emit(node.operand)})"
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+        return f"({_emit(node.left)} {_BINARY[type(node.op)]} {_emit(node.right)})"
+
+    if isinstance(node, ast.Compare) and all(type(op) in _COMPARE for op in node.ops):
+        # Цепочка a <= b <= c означает a <= b and b <= c
+        operands = [_emit(node.left)] + [_emit(c) for c in node.comparators]
+        parts = [_COMPARE[type(op)].format(operands[i], operands[i + 1])
+                 for i, op in enumerate(node.ops)]
+        return parts[0] if len(parts) == 1 else "(" + " & ".join(parts) + ")"
+
+    raise ValueError(f"Unsupported syntax: {ast.dump(node)}")
+
+
+@lru_cache(maxsize=256)
+def compile_bitset(expression: str) -> Callable[[Sequence[int], int], int]:
+    """
+    Компилирует выражение вида '({0} and not {1}) == {2}' в функцию
+    f(columns, full) -> маска строк, на которых выражение истинно.
+    """
+    source = _PLACEHOLDER_RE.sub(r"_v\1", expression)
+    code = _emit(ast.parse(source.strip(), mode="eval"))
+
+    return eval(compile(f"lambda v, F: {code}", "<bitset>", "eval"), {"__builtins__": {}})
+
+
+@lru_cache(maxsize=256)
+def truth_mask(expression: str, var_count: int) -> int:
+    """Маска строк таблицы истинности, на которых выражение истинно."""
+    full = full_mask(var_count)
+    return compile_bitset(expression)(variable_columns(var_count), full) & full